@@ -0,0 +1,35 @@
+"""Unique index on organizations.email (signup relies on it instead of a pre-check SELECT)
+
+Revision ID: n1o2p3q4r5s6
+Revises: m0n1o2p3q4r5
+Create Date: 2026-10-16
+
+users.email / users.phone are already unique. Signup stores org emails lower-cased; resolve any
+existing duplicates before upgrading or the index creation fails.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "n1o2p3q4r5s6"
+down_revision = "m0n1o2p3q4r5"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "uq_organizations_email"
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not _index_exists(bind, "organizations", INDEX_NAME):
+        op.create_index(INDEX_NAME, "organizations", ["email"], unique=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if _index_exists(bind, "organizations", INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name="organizations")
@@ -0,0 +1,42 @@
+"""Composite indexes for state admin ticket/inventory filters
+
+Revision ID: o2p3q4r5s6t7
+Revises: n1o2p3q4r5s6
+Create Date: 2026-10-16
+
+State admin dashboards filter tickets by city (+ status, + organization) and count active tickets
+per engineer; inventory listings filter by organization + city. MySQL has no INCLUDE columns or
+partial indexes, so these are plain composite indexes (InnoDB secondary indexes carry the PK).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "o2p3q4r5s6t7"
+down_revision = "n1o2p3q4r5s6"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_tickets_city_status_org", "tickets", ["city_id", "status", "organization_id"]),
+    ("ix_tickets_engineer_status", "tickets", ["assigned_engineer_id", "status"]),
+    ("ix_inventory_org_city_part", "inventory", ["organization_id", "city_id", "part_id"]),
+)
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if not _index_exists(bind, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for name, table, _columns in reversed(INDEXES):
+        if _index_exists(bind, table, name):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""Add per-day ticket number counters
+
+Revision ID: p3q4r5s6t7u8
+Revises: o2p3q4r5s6t7
+Create Date: 2026-10-16
+
+ER-YYYYMMDD-NNN numbers were derived from MAX(ticket_number) plus an existence probe per allocation.
+A counter row per day lets allocation bump one row instead; it is seeded from existing tickets on first use.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "p3q4r5s6t7u8"
+down_revision = "o2p3q4r5s6t7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ticket_number_counters",
+        sa.Column("day", sa.String(8), primary_key=True),
+        sa.Column("counter", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ticket_number_counters")
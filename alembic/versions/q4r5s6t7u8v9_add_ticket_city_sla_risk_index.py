@@ -0,0 +1,34 @@
+"""Covering index for per-city SLA risk counts
+
+Revision ID: q4r5s6t7u8v9
+Revises: p3q4r5s6t7u8
+Create Date: 2026-10-16
+
+State compliance alerts count tickets and at-risk tickets (sla_breach_risk >= 0.7) per city. MySQL has
+no materialized views; with (city_id, sla_breach_risk) the grouped count reads the index alone, and the
+endpoint caches the result per state until a ticket write.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "q4r5s6t7u8v9"
+down_revision = "p3q4r5s6t7u8"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_tickets_city_sla_risk"
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    if not _index_exists(op.get_bind(), "tickets", INDEX_NAME):
+        op.create_index(INDEX_NAME, "tickets", ["city_id", "sla_breach_risk"])
+
+
+def downgrade() -> None:
+    if _index_exists(op.get_bind(), "tickets", INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name="tickets")
@@ -0,0 +1,45 @@
+"""Composite indexes for state admin SLA risk, training gap and forecast queries
+
+Revision ID: r5s6t7u8v9w0
+Revises: q4r5s6t7u8v9
+Create Date: 2026-10-16
+
+MySQL has no partial indexes and InnoDB builds secondary indexes online, so these are plain
+composites; (city_id, sla_breach_risk) already exists as ix_tickets_city_sla_risk.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "r5s6t7u8v9w0"
+down_revision = "q4r5s6t7u8v9"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_tickets_state_sla_risk", "tickets", ["state_id", "sla_breach_risk"]),
+    ("ix_tickets_engineer_parent", "tickets", ["assigned_engineer_id", "parent_ticket_id"]),
+    (
+        "ix_inventory_tx_inventory_type_created",
+        "inventory_transactions",
+        ["inventory_id", "transaction_type", "created_at"],
+    ),
+)
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if not _index_exists(bind, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for name, table, _columns in reversed(INDEXES):
+        if _index_exists(bind, table, name):
+            op.drop_index(name, table_name=table)
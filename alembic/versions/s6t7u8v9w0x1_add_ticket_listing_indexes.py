@@ -0,0 +1,39 @@
+"""Composite indexes for newest-first ticket listing per customer and organization
+
+Revision ID: s6t7u8v9w0x1
+Revises: r5s6t7u8v9w0
+Create Date: 2026-10-16
+
+City admins and engineers already filter through ix_tickets_city_status_org and ix_tickets_engineer_status.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "s6t7u8v9w0x1"
+down_revision = "r5s6t7u8v9w0"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_tickets_customer_created", "tickets", ["customer_id", "created_at"]),
+    ("ix_tickets_org_created", "tickets", ["organization_id", "created_at"]),
+)
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if not _index_exists(bind, table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for name, table, _columns in reversed(INDEXES):
+        if _index_exists(bind, table, name):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""Unique (country_id, name) on states and (state_id, name) on cities
+
+Revision ID: t7u8v9w0x1y2
+Revises: s6t7u8v9w0x1
+Create Date: 2026-10-16
+
+Signup auto-creates missing states/cities and relies on these to turn a concurrent duplicate insert
+into an IntegrityError it recovers from. Merge any existing duplicate rows before upgrading or the
+index creation fails.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "t7u8v9w0x1y2"
+down_revision = "s6t7u8v9w0x1"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("uq_states_country_name", "states", ["country_id", "name"]),
+    ("uq_cities_state_name", "cities", ["state_id", "name"]),
+)
+
+
+def _index_exists(bind, table_name, index_name):
+    return any(ix["name"] == index_name for ix in sa.inspect(bind).get_indexes(table_name))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if not _index_exists(bind, table, name):
+            op.create_index(name, table, columns, unique=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for name, table, _columns in reversed(INDEXES):
+        if _index_exists(bind, table, name):
+            op.drop_index(name, table_name=table)
@@ -31,7 +31,8 @@ from app.models.ticket import Ticket, TicketComment, TicketStatus
 from app.models.user import UserRole
 from app.models.ai_models import AIKnowledgeBase
 from app.services.ai.role_assistant import ROLE_GUIDES
-from app.models.notification import Notification, NotificationType, NotificationChannel, NotificationStatus
+from app.models.notification import Notification, NotificationType, NotificationStatus
+from app.services.notification_channels import customer_channels
 
 router = APIRouter()
 
@@ -55,13 +56,7 @@ def _notify_customer_for_ticket(
 ):
     if not ticket.customer_id:
         return
-    channels = [NotificationChannel.IN_APP]
-    if ticket.contact_preferences:
-        if "sms" in ticket.contact_preferences:
-            channels.append(NotificationChannel.SMS)
-        if "whatsapp" in ticket.contact_preferences:
-            channels.append(NotificationChannel.WHATSAPP)
-    for channel in channels:
+    for channel in customer_channels(ticket.contact_preferences):
         notification = Notification(
             organization_id=ticket.organization_id,
             user_id=ticket.customer_id,
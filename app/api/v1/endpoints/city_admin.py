@@ -20,6 +20,7 @@ from app.models.location import City
 from app.models.notification import Notification, NotificationType, NotificationChannel, NotificationStatus
 from app.models.escalation import Escalation, EscalationStatus
 from app.services.ai.anomaly_detection import AnomalyDetectionService
+from app.services.notification_channels import customer_channels
 from app.services.ticket_numbering import allocate_er_ticket_number
 from app.core.email import send_ticket_resolved_email
 from app.core.config import frontend_base_url
@@ -801,13 +802,7 @@ def create_complaint_follow_up(
         follow_up_ticket_id = follow_up_ticket.id
 
         if ticket.customer_id:
-            channels = [NotificationChannel.IN_APP]
-            if ticket.contact_preferences:
-                if "sms" in ticket.contact_preferences:
-                    channels.append(NotificationChannel.SMS)
-                if "whatsapp" in ticket.contact_preferences:
-                    channels.append(NotificationChannel.WHATSAPP)
-            for channel in channels:
+            for channel in customer_channels(ticket.contact_preferences):
                 notification = Notification(
                     organization_id=ticket.organization_id,
                     user_id=ticket.customer_id,
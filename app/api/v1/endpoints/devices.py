@@ -10,6 +10,7 @@ from datetime import datetime
 import io
 import traceback
 import os
+import shutil
 import uuid
 
 from app.core.database import get_db
@@ -37,6 +38,9 @@ except ImportError:
     OPENPYXL_AVAILABLE = False
 
 
+_UPLOAD_CHUNK = 1 << 20
+
+
 def _save_upload_file(upload: UploadFile, subdir: str) -> str:
     base_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "uploads", subdir)
     os.makedirs(base_dir, exist_ok=True)
@@ -44,7 +48,8 @@ def _save_upload_file(upload: UploadFile, subdir: str) -> str:
     filename = f"{uuid.uuid4().hex}{ext}"
     file_path = os.path.join(base_dir, filename)
     with open(file_path, "wb") as f:
-        f.write(upload.file.read())
+        # Copy in 1 MB chunks so large photos never sit in memory whole
+        shutil.copyfileobj(upload.file, f, _UPLOAD_CHUNK)
     return f"/uploads/{subdir}/{filename}"
 
 
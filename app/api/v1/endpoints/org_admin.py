@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile,
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from sqlalchemy import func, and_, or_, case
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta, timezone
 import json
@@ -48,6 +49,20 @@ router = APIRouter()
 route_optimizer = RouteOptimizationService()
 
 
+def _commit_organization(db: Session) -> None:
+    """Commit an organization write; a uq_organizations_email violation becomes the duplicate-email 400."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        # MySQL: "Duplicate entry '...' for key 'organizations.uq_organizations_email'";
+        # SQLite: "UNIQUE constraint failed: organizations.email"
+        raw = str(exc.orig).lower()
+        if "uq_organizations_email" not in raw and "organizations.email" not in raw:
+            raise
+        raise HTTPException(status_code=400, detail="This email is already used by another organization")
+
+
 def _org_labour_charges(org: Organization) -> dict:
     wp = org.warranty_policy if isinstance(org.warranty_policy, dict) else {}
     lc = wp.get("fixed_labour_charges") if isinstance(wp.get("fixed_labour_charges"), dict) else {}
@@ -206,11 +221,11 @@ def update_my_organization(
     if not phone:
         raise HTTPException(status_code=400, detail="Phone is required")
 
-    dup = (
-        db.query(Organization)
+    dup = db.query(
+        db.query(Organization.id)
         .filter(Organization.email == email, Organization.id != org.id)
-        .first()
-    )
+        .exists()
+    ).scalar()
     if dup:
         raise HTTPException(status_code=400, detail="This email is already used by another organization")
 
@@ -249,7 +264,8 @@ def update_my_organization(
     org.state_id = state_id_int
     org.city_id = city_id
 
-    db.commit()
+    # The check above is advisory; a concurrent update can still claim the email before this commit
+    _commit_organization(db)
     db.refresh(org)
 
     org = db.query(Organization).options(
@@ -1567,7 +1583,7 @@ def create_partner(
     )
     
     db.add(partner)
-    db.commit()
+    _commit_organization(db)
     db.refresh(partner)
     
     # Create organization hierarchy
@@ -2,6 +2,7 @@
 Platform Admin endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Body
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -12,6 +13,7 @@ from app.models.organization import Organization
 from app.models.subscription import Plan, Subscription, Vendor, VendorOrganization
 from app.models.device import Device
 from app.models.ticket import Ticket
+from app.services.subscription_billing import active_plan_cache
 
 router = APIRouter()
 
@@ -141,6 +143,7 @@ def update_plan(
         plan.display_order = plan_data["display_order"]
     
     db.commit()
+    active_plan_cache.pop(plan_id, None)
     db.refresh(plan)
     
     return {
@@ -170,6 +173,7 @@ def delete_plan(
     
     db.delete(plan)
     db.commit()
+    active_plan_cache.pop(plan_id, None)
     
     return {"message": "Plan deleted successfully"}
 
@@ -432,25 +436,25 @@ def create_vendor(
     vendor_email = vendor_data["user_email"]
     vendor_phone = vendor_data["user_phone"]
     
-    # Check if vendor email exists
-    existing_vendor = db.query(Vendor).filter(Vendor.email == vendor_email).first()
-    if existing_vendor:
+    # Vendor email / user email / user phone uniqueness in one round trip
+    taken = db.execute(
+        select(
+            exists().where(Vendor.email == vendor_email).label("vendor_email"),
+            exists().where(User.email == vendor_email).label("user_email"),
+            exists().where(User.phone == vendor_phone).label("user_phone"),
+        )
+    ).one()
+    if taken.vendor_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Vendor with this email already exists"
         )
-    
-    # Check if user email exists
-    existing_user = db.query(User).filter(User.email == vendor_email).first()
-    if existing_user:
+    if taken.user_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists"
         )
-    
-    # Check if user phone exists
-    existing_phone = db.query(User).filter(User.phone == vendor_phone).first()
-    if existing_phone:
+    if taken.user_phone:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this phone number already exists"
@@ -4,27 +4,49 @@ Accepts country_id/state_id/city_id (numeric) OR country_code/state_code/state_n
 so signup works when locations API returns id: null (e.g. India-only static data before seed).
 Password: optional. If omitted, a set-password link is sent by email (one-time, expires after use).
 """
+import logging
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, raiseload
 
+from app.core.cache import TTLCache
 from app.core.database import get_db
-from app.core.security import get_password_hash, create_access_token, get_pending_password_hash
+from app.schemas.signup import SignupRequest
+from app.core.security import create_access_token, submit_password_hash
 from app.core.config import settings
-from app.services.subscription_billing import apply_complimentary_subscription_fields
+from app.services.state_views import invalidate_state_city_ids
+from app.services.subscription_billing import complimentary_subscription_fields, get_active_plan
 from app.core.password_set_email import create_and_send_set_password_token
 from app.core.email_verification import create_email_verification_otp
 from app.core.email import send_email_verification_otp
-from app.models.organization import Organization, OrganizationType
+from app.models.organization import Organization
 from app.models.user import User, UserRole
-from app.models.subscription import Plan, Subscription, BillingPeriod, Vendor, VendorOrganization
+from app.models.subscription import Subscription, BillingPeriod, Vendor, VendorOrganization
 from app.models.location import Country, State, City
 from app.data.india_locations import INDIA_STATES, INDIA_CITIES_BY_STATE, state_code_to_name
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Resolved (country_id, state_id, city_id) for existing location rows, keyed by the normalized request refs.
+# Only JOIN hits are cached, never rows auto-created in a not-yet-committed signup transaction.
+_location_ids_cache = TTLCache(maxsize=4096, ttl=3600)
+
+# Billing period -> (Plan price column, subscription length)
+_BILLING_PERIOD_TERMS = {
+    BillingPeriod.MONTHLY: ("monthly_price", timedelta(days=30)),
+    BillingPeriod.ANNUAL: ("annual_price", timedelta(days=365)),
+}
+
+# INDIA_STATES indexed by name and by upper-case code, for auto-creating missing State rows
+_STATE_BY_NAME = {s["name"]: s for s in INDIA_STATES}
+_STATE_BY_CODE = {s["code"].upper(): s for s in INDIA_STATES if s.get("code")}
+
 
 def _int_or_none(v):
     if v is None:
@@ -36,49 +58,91 @@ def _int_or_none(v):
         return None
 
 
-def _resolve_country_id(db: Session, signup_data: dict) -> int:
-    """Resolve country_id from signup_data (country_id or country_code)."""
-    cid = _int_or_none(signup_data.get("country_id"))
+def _parse_signup_request(signup_data: dict) -> SignupRequest:
+    """Validate the raw signup body, keeping this endpoint's 400 "Missing required field" contract."""
+    try:
+        return SignupRequest.model_validate(signup_data)
+    except ValidationError as e:
+        err = e.errors()[0]
+        field = ".".join(str(part) for part in err["loc"])
+        if not err["loc"] and err["type"] == "value_error":
+            # Model-level rule (location alternation): its message is already client-facing
+            detail = str(err["ctx"]["error"])
+        elif err["type"] == "missing" or not str(err.get("input") or "").strip():
+            detail = f"Missing required field: {field}"
+        elif field == "billing_period":
+            detail = f"Invalid billing period: {err.get('input')}. Must be 'monthly' or 'annual'"
+        else:
+            detail = f"Invalid {field}: {err['msg']}"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _raise_duplicate_signup(db: Session, exc: IntegrityError):
+    """Roll back and map a unique-index violation on signup to the matching 400 message."""
+    db.rollback()
+    raw = str(exc.orig).lower()
+    # MySQL: "Duplicate entry '...' for key 'users.ix_users_phone'"; SQLite: "UNIQUE constraint failed: users.phone"
+    key = raw.rsplit("for key", 1)[-1] if "for key" in raw else raw.rsplit("failed:", 1)[-1]
+    if "organizations" in key:
+        detail = "Organization with this email already exists"
+    elif "phone" in key:
+        detail = "User with this phone number already exists"
+    elif "email" in key:
+        detail = "User with this email already exists"
+    else:
+        raise exc
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _insert_returning_id(db: Session, model, values: dict) -> int:
+    """Insert one row with a Core INSERT (no ORM unit-of-work) and return its primary key."""
+    return db.execute(insert(model).values(**values)).inserted_primary_key[0]
+
+
+def _resolve_country_id(db: Session, payload: SignupRequest) -> int:
+    """Resolve country_id from payload (country_id or country_code)."""
+    cid = payload.country_id
     if cid:
-        country = db.query(Country).filter(Country.id == cid).first()
-        if country:
-            return country.id
-    code = (signup_data.get("country_code") or "").strip().upper() or None
+        found = db.query(Country.id).filter(Country.id == cid).scalar()
+        if found:
+            return found
+    code = payload.country_code
     if not code:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Missing location: provide country_id or country_code (e.g. IN)"
         )
-    country = db.query(Country).filter(Country.code == code).first()
-    if country:
-        return country.id
+    found = db.query(Country.id).filter(Country.code == code).scalar()
+    if found:
+        return found
     # Create India (or other) from static; avoid duplicate if India exists by name but code was missing/different
     if code == "IN":
-        country = db.query(Country).filter(Country.name == "India").first()
-        if country:
-            return country.id
-        country = db.query(Country).filter(Country.code == "IN").first()
-        if country:
-            return country.id
-        country = Country(name="India", code="IN")
-        db.add(country)
-        db.flush()
-        return country.id
+        india = or_(Country.name == "India", Country.code == "IN")
+        existing_id = db.query(Country.id).filter(india).limit(1).scalar()
+        if existing_id:
+            return existing_id
+        # name and code are both unique: if a concurrent signup inserts India first, roll back
+        # just this insert and read its row instead of failing the signup
+        try:
+            with db.begin_nested():
+                return _insert_returning_id(db, Country, dict(name="India", code="IN"))
+        except IntegrityError:
+            return db.query(Country.id).filter(india).limit(1).scalar()
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=f"Country not found for code: {code}. Only India (IN) can be auto-created."
     )
 
 
-def _resolve_state_id(db: Session, signup_data: dict, country_id: int) -> int:
-    """Resolve state_id from signup_data (state_id or state_code or state_name)."""
-    sid = _int_or_none(signup_data.get("state_id"))
+def _resolve_state_id(db: Session, payload: SignupRequest, country_id: int) -> int:
+    """Resolve state_id from payload (state_id or state_code or state_name)."""
+    sid = payload.state_id
     if sid:
-        state = db.query(State).filter(State.id == sid, State.country_id == country_id).first()
-        if state:
-            return state.id
-    code = (signup_data.get("state_code") or "").strip().upper() or None
-    name = (signup_data.get("state_name") or "").strip() or None
+        found = db.query(State.id).filter(State.id == sid, State.country_id == country_id).scalar()
+        if found:
+            return found
+    code = payload.state_code
+    name = payload.state_name
     if not code and not name:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -87,61 +151,139 @@ def _resolve_state_id(db: Session, signup_data: dict, country_id: int) -> int:
     if code and not name:
         name = state_code_to_name(code)
     if name:
-        state = db.query(State).filter(State.country_id == country_id).filter(
+        # Matching by name too avoids a duplicate when the state exists with a different/missing code
+        found = db.query(State.id).filter(State.country_id == country_id).filter(
             (State.name == name) | (State.code == (code or name))
-        ).first()
-        if state:
-            return state.id
-        # Avoid duplicate: state may exist by name with different/missing code
-        state = db.query(State).filter(State.country_id == country_id, State.name == name).first()
-        if state:
-            return state.id
+        ).limit(1).scalar()
+        if found:
+            return found
         # Create from INDIA_STATES
-        for s in INDIA_STATES:
-            if (s.get("name") == name) or ((s.get("code") or "").upper() == (code or "")):
-                state = State(name=s["name"], code=s.get("code"), country_id=country_id)
-                db.add(state)
-                db.flush()
-                return state.id
+        s = _STATE_BY_NAME.get(name) or _STATE_BY_CODE.get(code or "")
+        if s:
+            # (country_id, name) is unique: a concurrent signup that inserted it first wins, read its row
+            try:
+                with db.begin_nested():
+                    return _insert_returning_id(db, State, dict(name=s["name"], code=s.get("code"), country_id=country_id))
+            except IntegrityError:
+                return db.query(State.id).filter(State.country_id == country_id, State.name == s["name"]).scalar()
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail="State not found for given state_code/state_name"
     )
 
 
-def _resolve_city_id(db: Session, signup_data: dict, state_id: int) -> int:
-    """Resolve city_id from signup_data (city_id or city_name)."""
-    cid = _int_or_none(signup_data.get("city_id"))
+def _resolve_city_id(db: Session, payload: SignupRequest, state_id: int) -> int:
+    """Resolve city_id from payload (city_id or city_name)."""
+    cid = payload.city_id
     if cid:
-        city = db.query(City).filter(City.id == cid, City.state_id == state_id).first()
-        if city:
-            return city.id
-    name = (signup_data.get("city_name") or "").strip() or None
+        found = db.query(City.id).filter(City.id == cid, City.state_id == state_id).scalar()
+        if found:
+            return found
+    name = payload.city_name
     if not name:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Missing location: provide city_id or city_name"
         )
-    city = db.query(City).filter(City.state_id == state_id, City.name == name).first()
-    if city:
-        return city.id
-    state = db.query(State).filter(State.id == state_id).first()
+    found = db.query(City.id).filter(City.state_id == state_id, City.name == name).limit(1).scalar()
+    if found:
+        return found
+    state = db.query(State.name, State.country_id).filter(State.id == state_id).first()
     if state:
         # Avoid duplicate: city may exist under another state row (same country)
-        city = db.query(City).join(State).filter(State.country_id == state.country_id, City.name == name).first()
-        if city:
-            return city.id
+        found = (
+            db.query(City.id).join(State)
+            .filter(State.country_id == state.country_id, City.name == name)
+            .limit(1).scalar()
+        )
+        if found:
+            return found
         if state.name and state.name in INDIA_CITIES_BY_STATE and name in INDIA_CITIES_BY_STATE[state.name]:
-            city = City(name=name, state_id=state_id)
-            db.add(city)
-            db.flush()
-            return city.id
+            # (state_id, name) is unique: a concurrent signup that inserted it first wins, read its row
+            try:
+                with db.begin_nested():
+                    city_id = _insert_returning_id(db, City, dict(name=name, state_id=state_id))
+            except IntegrityError:
+                return db.query(City.id).filter(City.state_id == state_id, City.name == name).scalar()
+            # Core INSERT skips the City mapper events, so drop the state's cached city ids here
+            invalidate_state_city_ids(state_id)
+            return city_id
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail="City not found for given city_name"
     )
 
 
+def _find_existing_location_ids(db: Session, payload: SignupRequest):
+    """
+    One JOIN query for the common case where country, state and city all exist already.
+    Returns (country_id, state_id, city_id) or None; ids win over codes/names like in the resolvers.
+    Hits are cached per process: seeded locations are effectively static.
+    """
+    country_code = payload.country_code
+    state_code = payload.state_code
+    state_name = payload.state_name
+    city_name = payload.city_name
+    if state_code and not state_name:
+        state_name = state_code_to_name(state_code)
+
+    if payload.country_id:
+        country_cond = Country.id == payload.country_id
+    elif country_code:
+        country_cond = Country.code == country_code
+    else:
+        return None
+    if payload.state_id:
+        state_cond = State.id == payload.state_id
+    elif state_name:
+        state_cond = (State.name == state_name) | (State.code == (state_code or state_name))
+    elif state_code:
+        state_cond = State.code == state_code
+    else:
+        return None
+    if payload.city_id:
+        city_cond = City.id == payload.city_id
+    elif city_name:
+        city_cond = City.name == city_name
+    else:
+        return None
+
+    cache_key = (
+        payload.country_id or country_code,
+        payload.state_id or (state_code, state_name),
+        payload.city_id or city_name,
+    )
+    cached = _location_ids_cache.get(cache_key)
+    if cached:
+        return cached
+    row = (
+        db.query(Country.id, State.id, City.id)
+        .select_from(Country)
+        .join(State, State.country_id == Country.id)
+        .join(City, City.state_id == State.id)
+        .filter(country_cond, state_cond, city_cond)
+        .first()
+    )
+    if not row:
+        return None
+    ids = tuple(row)
+    _location_ids_cache.set(cache_key, ids)
+    return ids
+
+
+def _resolve_location_ids(db: Session, payload: SignupRequest):
+    """Resolve (country_id, state_id, city_id): single JOIN when all rows exist, else step by step (may create)."""
+    ids = _find_existing_location_ids(db, payload)
+    if ids:
+        return ids
+    country_id = _resolve_country_id(db, payload)
+    state_id = _resolve_state_id(db, payload, country_id)
+    city_id = _resolve_city_id(db, payload, state_id)
+    return country_id, state_id, city_id
+
+
+# Sync def on purpose: the session is sync (pymysql), so FastAPI runs this in its threadpool and the
+# event loop is never blocked. An AsyncSession would need an async MySQL driver app-wide.
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def signup_organization(
     signup_data: dict = Body(...),
@@ -155,70 +297,22 @@ def signup_organization(
     Optionally links to vendor if vendor_code or vendor_id is provided
     """
     # Required fields (location can be id or code/name). admin_password is optional; if omitted, set-password email is sent.
-    required_core = [
-        "org_name", "org_type", "org_email", "org_phone",
-        "admin_name", "admin_email", "admin_phone",
-        "plan_id", "billing_period"
-    ]
-    for field in required_core:
-        if field not in signup_data or signup_data[field] is None or signup_data[field] == "":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Missing required field: {field}"
-            )
-    # Location: need either ids or code/name
-    has_country_id = _int_or_none(signup_data.get("country_id")) is not None
-    has_country_code = (signup_data.get("country_code") or "").strip()
-    if not has_country_id and not has_country_code:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Missing location: provide country_id or country_code (e.g. IN)"
-        )
-    has_state = _int_or_none(signup_data.get("state_id")) is not None or (signup_data.get("state_code") or "").strip() or (signup_data.get("state_name") or "").strip()
-    if not has_state:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing location: provide state_id or state_code/state_name")
-    has_city = _int_or_none(signup_data.get("city_id")) is not None or (signup_data.get("city_name") or "").strip()
-    if not has_city:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing location: provide city_id or city_name")
-
-    org_email = str(signup_data["org_email"]).strip().lower()
-    admin_email = str(signup_data["admin_email"]).strip().lower()
-
-    # Check if organization email already exists (case-insensitive)
-    existing_org = db.query(Organization).filter(
-        func.lower(Organization.email) == org_email
-    ).first()
-    if existing_org:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Organization with this email already exists"
-        )
+    payload = _parse_signup_request(signup_data)
+    # Location (ids or code/name for each level) is checked by SignupRequest.location_provided
 
-    # Check if admin email already exists (case-insensitive)
-    existing_user = db.query(User).filter(
-        func.lower(User.email) == admin_email
-    ).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
-        )
-    
-    # Check if admin phone already exists
-    existing_phone = db.query(User).filter(
-        User.phone == signup_data["admin_phone"]
-    ).first()
-    if existing_phone:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this phone number already exists"
-        )
-    
-    # Validate plan exists and is active
-    plan = db.query(Plan).filter(
-        Plan.id == signup_data["plan_id"],
-        Plan.is_active == True
-    ).first()
+    org_email = payload.org_email
+    admin_email = payload.admin_email
+
+    # Password: if provided use it; otherwise placeholder and send set-password email.
+    # Hash in the background so bcrypt overlaps with the validation queries below.
+    use_password_email = not (payload.admin_password or "").strip()
+    password_hash_future = submit_password_hash(None if use_password_email else payload.admin_password)
+
+    # Org email / admin email / admin phone uniqueness is enforced by unique indexes: the inserts
+    # below fail with IntegrityError (mapped to 400) instead of racing a SELECT pre-check.
+
+    # Validate plan exists and is active (only the columns used for pricing/response, no ORM instance)
+    plan = get_active_plan(db, payload.plan_id)
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -226,160 +320,60 @@ def signup_organization(
         )
 
     # Resolve location ids (from id or code/name) so DB gets valid FKs
-    country_id = _resolve_country_id(db, signup_data)
-    state_id = _resolve_state_id(db, signup_data, country_id)
-    city_id = _resolve_city_id(db, signup_data, state_id)
-    
-    # Create organization
-    organization = Organization(
-        name=signup_data["org_name"],
-        org_type=OrganizationType(signup_data["org_type"]),
-        email=org_email,
-        phone=signup_data["org_phone"],
-        address=signup_data.get("org_address", ""),
-        country_id=country_id,
-        state_id=state_id,
-        city_id=city_id,
-        is_active=True
-    )
-    
-    db.add(organization)
-    db.flush()  # Get organization ID without committing
+    country_id, state_id, city_id = _resolve_location_ids(db, payload)
     
-    # Create subscription
-    billing_period_str = signup_data["billing_period"].lower()
+    # Create organization (Core insert: this write-only path needs the new id, not an ORM instance).
+    # Organization -> subscription -> organization.subscription_id stay separate statements: MySQL has
+    # no INSERT ... RETURNING or data-modifying CTEs to fuse the FK-linked inserts into one round trip.
+    org_name = payload.org_name
     try:
-        billing_period = BillingPeriod(billing_period_str)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid billing period: {signup_data['billing_period']}. Must be 'monthly' or 'annual'"
-        )
-    
-    # Get price based on billing period - explicitly convert to float
-    # Refresh plan from database to ensure we have latest prices
-    db.refresh(plan)
-    
-    if billing_period == BillingPeriod.MONTHLY:
-        raw_price = plan.monthly_price
-        if raw_price is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Plan {plan.name} (ID: {plan.id}) does not have a monthly price set. Monthly price: {plan.monthly_price}"
-            )
-    elif billing_period == BillingPeriod.ANNUAL:
-        raw_price = plan.annual_price
-        if raw_price is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Plan {plan.name} (ID: {plan.id}) does not have an annual price set. Annual price: {plan.annual_price}"
-            )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported billing period: {billing_period}"
-        )
-    
-    # Validate and convert price
+        organization_id = _insert_returning_id(db, Organization, dict(
+            name=org_name,
+            org_type=payload.org_type,
+            email=org_email,
+            phone=payload.org_phone,
+            address=payload.org_address,
+            country_id=country_id,
+            state_id=state_id,
+            city_id=city_id,
+            is_active=True
+        ))
+    except IntegrityError as e:
+        _raise_duplicate_signup(db, e)
+    
+    # Create subscription (price validated once, then stored as-is)
+    billing_period = payload.billing_period
+    
+    # Get price based on billing period; validated once here and stored as a float
+    price_attr, period_length = _BILLING_PERIOD_TERMS[billing_period]
+    raw_price = getattr(plan, price_attr)
     if raw_price is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Plan {plan.name} does not have a valid price for {billing_period.value} billing period"
+            detail=f"Plan {plan.name} (ID: {plan.id}) does not have a {billing_period.value} price set"
         )
-    
     try:
-        price = float(raw_price)
+        final_price = float(raw_price)
     except (ValueError, TypeError) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid price value for plan {plan.name}: {raw_price} (error: {str(e)})"
         )
-    
-    if price <= 0:
+    if final_price <= 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Price must be greater than 0 for plan {plan.name}. Got: {price}"
-        )
-    
-    # Final validation - ensure price is definitely set
-    if price is None or price <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Price calculation failed for plan {plan.name}. Price: {price}, Billing: {billing_period.value}"
+            detail=f"Price must be greater than 0 for plan {plan.name}. Got: {final_price}"
         )
     
     # Calculate end date
     start_date = datetime.now(timezone.utc)
-    if billing_period == BillingPeriod.MONTHLY:
-        end_date = start_date + timedelta(days=30)
-    else:
-        end_date = start_date + timedelta(days=365)
+    end_date = start_date + period_length
     
-    # Create subscription with explicit price validation
-    # Ensure price is definitely a float and not None
-    try:
-        subscription_price = float(price)
-    except (ValueError, TypeError) as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Cannot convert price to float: {price} (type: {type(price)}, error: {str(e)})"
-        )
-    
-    # Final safety check - price must be a positive number
-    if subscription_price is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Price is None after conversion. Original price: {price}, Billing: {billing_period.value}"
-        )
-    
-    if not isinstance(subscription_price, (int, float)):
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Price is not a number: {subscription_price} (type: {type(subscription_price)})"
-        )
-    
-    if subscription_price <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Price must be positive: {subscription_price}"
-        )
-    
-    # Create subscription - price is guaranteed to be a valid float at this point
-    # Final validation with explicit error messages
-    if subscription_price is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"CRITICAL ERROR: subscription_price is None! price={price}, raw_price={raw_price}, billing={billing_period.value}, plan_id={plan.id}"
-        )
-    
-    if not isinstance(subscription_price, (int, float)):
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"CRITICAL ERROR: subscription_price is not a number! Value: {subscription_price}, Type: {type(subscription_price)}"
-        )
-    
-    if subscription_price <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"CRITICAL ERROR: subscription_price is not positive! Value: {subscription_price}"
-        )
-    
-    # Create subscription with explicit price (ensure it's a float, not None)
-    final_price = float(subscription_price)  # One more conversion to be absolutely sure
-    
-    # Ensure final_price is definitely a number
-    if final_price is None or not isinstance(final_price, (int, float)) or final_price <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Invalid final_price: {final_price} (type: {type(final_price)})"
-        )
-    
-    # Create subscription with ALL fields including current_price
-    subscription = Subscription(
-        organization_id=organization.id,
+    subscription_values = dict(
+        organization_id=organization_id,
         plan_id=plan.id,
         billing_period=billing_period,
-        current_price=final_price,  # MUST be set here
+        current_price=final_price,
         currency="INR",
         status="active",
         start_date=start_date,
@@ -387,70 +381,24 @@ def signup_organization(
         auto_renew=True,
         autopay_setup_complete=False,
     )
-    apply_complimentary_subscription_fields(subscription, start_date)
-    
-    # Double-check it's set (shouldn't be needed but just in case)
-    if not hasattr(subscription, 'current_price') or subscription.current_price is None:
-        # Force set it using setattr
-        setattr(subscription, 'current_price', final_price)
-    
-    # Final verification
-    if subscription.current_price is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"CRITICAL: current_price is None! final_price={final_price}, type={type(final_price)}, subscription.current_price={subscription.current_price}"
-        )
-    
-    # Ensure it's a float - convert explicitly
-    subscription.current_price = float(subscription.current_price)
-    
-    # One final check before adding to session
-    if subscription.current_price is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"FINAL CHECK FAILED: current_price is None right before db.add()! final_price={final_price}"
-        )
-    
-    # Add to session and flush
-    db.add(subscription)
-    
-    # Verify price is still set after adding to session
-    if subscription.current_price is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Price became None after db.add()! This should not happen."
-        )
-    
-    try:
-        db.flush()
-    except Exception as e:
-        # If flush fails, check the subscription object state
-        error_msg = str(e)
-        if "current_price" in error_msg.lower() or "cannot be null" in error_msg.lower():
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Database error: {error_msg}. Subscription current_price={subscription.current_price}, final_price={final_price}, type={type(subscription.current_price)}"
-            )
-        raise
+    subscription_values.update(complimentary_subscription_fields(start_date, subscription_values["status"]))
+    subscription_id = _insert_returning_id(db, Subscription, subscription_values)
     
     # Link subscription to organization
-    organization.subscription_id = subscription.id
+    db.execute(
+        update(Organization)
+        .where(Organization.id == organization_id)
+        .values(subscription_id=subscription_id)
+    )
     
-    # Password: if provided use it; otherwise placeholder and send set-password email
-    use_password_email = not signup_data.get("admin_password") or not str(signup_data.get("admin_password", "")).strip()
-    if use_password_email:
-        password_hash = get_pending_password_hash()
-    else:
-        password_hash = get_password_hash(signup_data["admin_password"])
-
     # Create admin user (use resolved location ids)
     admin_user = User(
         email=admin_email,
-        phone=signup_data["admin_phone"],
-        password_hash=password_hash,
-        full_name=signup_data["admin_name"],
+        phone=payload.admin_phone,
+        password_hash=password_hash_future.result(),
+        full_name=payload.admin_name,
         role=UserRole.ORGANIZATION_ADMIN,
-        organization_id=organization.id,
+        organization_id=organization_id,
         country_id=country_id,
         state_id=state_id,
         city_id=city_id,
@@ -461,7 +409,11 @@ def signup_organization(
     db.add(admin_user)
     
     # Flush to get IDs before vendor linking and token creation
-    db.flush()
+    try:
+        db.flush()
+    except IntegrityError as e:
+        _raise_duplicate_signup(db, e)
+    admin_user_id = admin_user.id  # PK assigned by the flush; no refresh needed
 
     # If using email flow: create one-time token and send set-password email (includes email verification OTP)
     if use_password_email:
@@ -478,120 +430,113 @@ def signup_organization(
     # Link to vendor if provided (vendor_id or vendor_code)
     vendor = None
     vendor_linked = False
-    commission_amount = 0.0  # Initialize for use in response
-    
-    if signup_data.get("vendor_id"):
-        try:
-            vendor = db.query(Vendor).filter(Vendor.id == int(signup_data["vendor_id"])).first()
-        except (ValueError, TypeError) as e:
-            print(f"Warning: Invalid vendor_id: {e}")
-            pass  # Invalid vendor_id, skip vendor linking
     
-    if not vendor and signup_data.get("vendor_code"):
+    # Resolve vendor by id and/or code in a single query; an id match wins over a code match
+    vendor_id = payload.vendor_id
+    vendor_code = payload.vendor_code
+
+    vendor_conds = []
+    if vendor_id is not None:
+        vendor_conds.append(Vendor.id == vendor_id)
+    if vendor_code:
+        vendor_conds.append(Vendor.vendor_code == vendor_code)
+    if vendor_conds:
         try:
-            vendor_code = str(signup_data["vendor_code"]).strip().upper()
-            vendor = db.query(Vendor).filter(Vendor.vendor_code == vendor_code).first()
+            # Only scalar columns are read below; raiseload turns any future lazy relationship access into an error
+            candidates = (
+                db.query(Vendor)
+                .options(raiseload("*"))
+                .filter(or_(*vendor_conds))
+                .limit(2)
+                .all()
+            )
+            vendor = next((v for v in candidates if v.id == vendor_id), None) or (candidates[0] if candidates else None)
             if not vendor:
-                print(f"Warning: Vendor with code '{vendor_code}' not found")
-        except Exception as e:
-            print(f"Warning: Error finding vendor by code: {e}")
-            pass  # Error finding vendor, skip vendor linking
-    
+                logger.warning("signup: vendor not found id=%s code=%r", vendor_id, vendor_code)
+        except Exception:
+            # Error finding vendor, skip vendor linking
+            logger.warning("signup: error finding vendor id=%s code=%r", vendor_id, vendor_code, exc_info=True)
+
     if vendor:
         try:
             # Validate vendor commission rate
             commission_rate = float(vendor.commission_rate) if vendor.commission_rate is not None else 0.15
             
             # Calculate commission based on subscription price and vendor commission rate
-            commission_amount = float(final_price) * commission_rate
-            
-            # Check if organization is already linked to a vendor (shouldn't happen for new org, but check anyway)
-            existing_vendor_org = db.query(VendorOrganization).filter(
-                VendorOrganization.organization_id == organization.id
-            ).first()
+            commission_amount = final_price * commission_rate
             
-            if not existing_vendor_org:
-                # Create VendorOrganization link
-                vendor_org = VendorOrganization(
-                    vendor_id=vendor.id,
-                    organization_id=organization.id,
-                    commission_earned=commission_amount,
-                    last_commission_date=datetime.now(timezone.utc),
-                    is_active=True
-                )
-                db.add(vendor_org)
-                vendor_linked = True
-                print(f"Successfully linked organization {organization.id} to vendor {vendor.id} (code: {vendor.vendor_code})")
-            else:
-                print(f"Warning: Organization {organization.id} already linked to vendor")
-        except Exception as e:
+            # Create VendorOrganization link. The organization was inserted in this transaction, so it
+            # cannot already have one (vendor_organizations.organization_id is unique regardless).
+            _insert_returning_id(db, VendorOrganization, dict(
+                vendor_id=vendor.id,
+                organization_id=organization_id,
+                commission_earned=commission_amount,
+                last_commission_date=start_date,
+                is_active=True
+            ))
+            vendor_linked = True
+            logger.debug("signup: linked organization id=%s to vendor id=%s code=%s", organization_id, vendor.id, vendor.vendor_code)
+        except Exception:
             # Log error but don't fail signup if vendor linking fails
-            import traceback
-            print(f"Warning: Failed to link vendor: {str(e)}")
-            print(traceback.format_exc())
+            logger.warning("signup: failed to link vendor id=%s to organization id=%s", vendor.id, organization_id, exc_info=True)
             # Continue with signup even if vendor linking fails
     
-    db.commit()
-    db.refresh(organization)
-    db.refresh(admin_user)
-    db.refresh(subscription)
-    
+    # Build the response from the inserted values and flush-assigned ids; nothing is re-read after commit.
+    next_billing_date = subscription_values["next_billing_date"]
+    complimentary_until = next_billing_date.isoformat() if next_billing_date else None
+    if use_password_email:
+        auth_fields = {
+            "message": "Organization registered. Check your email for your verification code and link to set your password.",
+            "password_set_via_email": True,
+        }
+    else:
+        auth_fields = {
+            "message": "Organization registered successfully",
+            "access_token": create_access_token(
+                data={
+                    "sub": str(admin_user_id),
+                    "email": admin_email,
+                    "role": UserRole.ORGANIZATION_ADMIN.value,
+                    "organization_id": organization_id
+                },
+                expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+            ),
+            "token_type": "bearer",
+        }
     response_data = {
-        "message": "Organization registered successfully",
         "organization": {
-            "id": organization.id,
-            "name": organization.name,
-            "email": organization.email
+            "id": organization_id,
+            "name": org_name,
+            "email": org_email
         },
         "user": {
-            "id": admin_user.id,
-            "email": admin_user.email,
-            "full_name": admin_user.full_name,
-            "role": admin_user.role.value
+            "id": admin_user_id,
+            "email": admin_email,
+            "full_name": payload.admin_name,
+            "role": UserRole.ORGANIZATION_ADMIN.value
         },
         "subscription": {
-            "id": subscription.id,
+            "id": subscription_id,
             "plan_name": plan.name,
-            "status": subscription.status,
-            "end_date": subscription.end_date.isoformat(),
-            "next_billing_date": subscription.next_billing_date.isoformat()
-            if subscription.next_billing_date
-            else None,
+            "status": subscription_values["status"],
+            "end_date": end_date.isoformat(),
+            "next_billing_date": complimentary_until,
         },
         "requires_autopay_setup": False,
         "razorpay_enabled": False,
-        "complimentary_until": subscription.next_billing_date.isoformat()
-        if subscription.next_billing_date
-        else None,
+        "complimentary_until": complimentary_until,
+        **auth_fields,
+        **({
+            "vendor": {
+                "vendor_code": vendor.vendor_code,
+                "vendor_name": vendor.name,
+                "commission_earned": commission_amount
+            }
+        } if vendor_linked else {}),
     }
 
-    if use_password_email:
-        response_data["message"] = (
-            "Organization registered. Check your email for your verification code and link to set your password."
-        )
-        response_data["password_set_via_email"] = True
-    else:
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": str(admin_user.id),
-                "email": admin_user.email,
-                "role": admin_user.role.value,
-                "organization_id": admin_user.organization_id
-            },
-            expires_delta=access_token_expires
-        )
-        response_data["access_token"] = access_token
-        response_data["token_type"] = "bearer"
-    
-    # Add vendor info if linked
-    if vendor_linked and vendor:
-        response_data["vendor"] = {
-            "vendor_code": vendor.vendor_code,
-            "vendor_name": vendor.name,
-            "commission_earned": commission_amount
-        }
-    
+    db.commit()
+
     return response_data
 
 
@@ -629,6 +574,9 @@ def signup_customer(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Missing required field: {field}"
             )
+    # Start bcrypt on the worker pool so it overlaps with the org and uniqueness lookups below
+    use_password_email = not customer_data.get("password") or not str(customer_data.get("password", "")).strip()
+    password_hash_future = submit_password_hash(None if use_password_email else customer_data["password"])
     org_id = _int_or_none(customer_data.get("organization_id"))
     if not org_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="organization_id must be a number")
@@ -640,8 +588,10 @@ def signup_customer(
     full_name = str(customer_data["full_name"]).strip()
     if not full_name:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="full_name is required")
-    existing_email = db.query(User).filter(User.email == email).first()
-    existing_phone = db.query(User).filter(User.phone == phone).first()
+    # Both unique lookups in one round trip (email and phone are each unique, so at most 2 rows)
+    matches = db.query(User).filter(or_(User.email == email, User.phone == phone)).limit(2).all()
+    existing_email = next((u for u in matches if u.email == email), None)
+    existing_phone = next((u for u in matches if u.phone == phone), None)
     if existing_email and existing_phone and existing_email.id != existing_phone.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -656,7 +606,6 @@ def signup_customer(
         if existing_customer.is_verified or existing_customer.last_login is not None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email or phone already registered")
 
-    use_password_email = not customer_data.get("password") or not str(customer_data.get("password", "")).strip()
     if existing_customer:
         customer = existing_customer
         customer.email = email
@@ -664,21 +613,13 @@ def signup_customer(
         customer.full_name = full_name
         customer.organization_id = org_id
         customer.is_active = True
-        if use_password_email:
-            customer.password_hash = get_pending_password_hash()
-            customer.is_verified = False
-        else:
-            customer.password_hash = get_password_hash(customer_data["password"])
-            customer.is_verified = False
+        customer.password_hash = password_hash_future.result()
+        customer.is_verified = False
     else:
-        if use_password_email:
-            password_hash = get_pending_password_hash()
-        else:
-            password_hash = get_password_hash(customer_data["password"])
         customer = User(
             email=email,
             phone=phone,
-            password_hash=password_hash,
+            password_hash=password_hash_future.result(),
             full_name=full_name,
             role=UserRole.CUSTOMER,
             organization_id=org_id,
@@ -700,8 +641,7 @@ def signup_customer(
             customer.full_name,
             context="customer account",
         )
-    db.commit()
-    db.refresh(customer)
+    # Capture the response before commit (commit expires the instance; reading it after would re-SELECT)
     out = {
         "message": "Customer registered successfully",
         "user": {
@@ -728,5 +668,6 @@ def signup_customer(
             expires_delta=access_token_expires
         )
         out["token_type"] = "bearer"
+    db.commit()
     return out
 
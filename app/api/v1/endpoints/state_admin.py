@@ -3,13 +3,17 @@ State Admin endpoints
 """
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Body, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from app.core.database import get_db
+from app.core.etag import etag_json_response
+from app.core.cache import TTLCache
 from app.core.permissions import require_role
-from sqlalchemy import func, text
+from app.core.sql_functions import seconds_between
+from sqlalchemy import and_, case, func, insert, or_, select, text, update
 from datetime import datetime, timedelta, timezone
 
 from app.models.user import User, UserRole
@@ -18,28 +22,58 @@ from app.models.location import City, State, Country
 from app.data.india_locations import INDIA_CITIES_BY_STATE
 
 
-def _india_cities_for_state(state_name: str) -> List[str]:
-    """Return list of city names for an Indian state from app.data.india_locations. Empty if not found."""
+# INDIA_CITIES_BY_STATE keyed by normalized state name; built once, the source data is static
+_INDIA_CITIES_BY_STATE_LOWER = {k.strip().lower(): tuple(v) for k, v in INDIA_CITIES_BY_STATE.items()}
+
+
+def _india_cities_for_state(state_name: str) -> Tuple[str, ...]:
+    """City names for an Indian state from app.data.india_locations (case-insensitive). Empty if not found."""
     if not state_name:
-        return []
-    key = state_name.strip()
-    if key in INDIA_CITIES_BY_STATE:
-        return list(INDIA_CITIES_BY_STATE[key])
-    key_lower = key.lower()
-    for k, cities in INDIA_CITIES_BY_STATE.items():
-        if k.strip().lower() == key_lower:
-            return list(cities)
-    return []
+        return ()
+    return _INDIA_CITIES_BY_STATE_LOWER.get(state_name.strip().lower(), ())
 from app.models.device import Device
 from app.models.inventory import Inventory, InventoryTransaction, Part
-from app.models.notification import Notification, NotificationType, NotificationChannel, NotificationStatus
+from app.models.notification import NotificationType, NotificationChannel, NotificationStatus
 from app.models.sla_policy import SLAPolicy, ServicePolicy, coerce_sla_type, sla_type_to_api
 from app.services.ai.demand_forecasting import DemandForecastingService
+from app.services.follow_up_notifications import create_follow_up_notifications
+from app.services.notification_channels import customer_channels
+from app.services.state_views import cached_state_query, mark_state_views_stale, state_city_ids, state_view_cache
 from app.services.ticket_numbering import allocate_er_ticket_number
 
-router = APIRouter()
+# orjson encodes the list/aggregate payloads here several times faster than the stdlib json encoder.
+# The hot read endpoints return ORJSONResponse themselves: their payloads are already primitives, so
+# FastAPI's jsonable_encoder walk is skipped as well.
+router = APIRouter(default_response_class=ORJSONResponse)
 forecast_service = DemandForecastingService()
 
+# Tickets counting toward an engineer's/city's active workload
+_ACTIVE_TICKET_STATUSES = (TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS)
+
+
+# state_id -> state name if the state is in India, else "" (states/countries are seed data)
+_india_state_name_cache = TTLCache(maxsize=1024, ttl=3600)
+
+
+def _india_state_name(db: Session, state_id: int) -> Optional[str]:
+    """Name of the state when its country is India (full district lists apply), else None. Cached per state."""
+    name = _india_state_name_cache.get(state_id)
+    if name is None:
+        row = (
+            db.query(State.name, Country.code, Country.name)
+            .join(Country, Country.id == State.country_id)
+            .filter(State.id == state_id)
+            .first()
+        )
+        name = ""
+        if row:
+            state_name, country_code, country_name = row
+            code = (country_code or "").strip().upper()
+            if code in ("IN", "IND") or "india" in (country_name or "").strip().lower():
+                name = state_name or ""
+        _india_state_name_cache.set(state_id, name)
+    return name or None
+
 
 def _days_from_time_range_state(time_range: str) -> int:
     key = (time_range or "30d").strip().lower()
@@ -59,8 +93,7 @@ def get_state_admin_analytics(
     days = _days_from_time_range_state(time_range)
     since = datetime.now(timezone.utc) - timedelta(days=days)
 
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    city_ids = [c.id for c in cities]
+    city_ids = state_city_ids(db, current_user.state_id)
     if not city_ids:
         return {
             "period": time_range,
@@ -107,21 +140,32 @@ def pick_available_engineer_state(db: Session, state_id: int, city_id: Optional[
         query = query.filter(User.city_id == city_id)
     if organization_id:
         query = query.filter(User.organization_id == organization_id)
-    engineers = query.all()
-    if not engineers:
-        return None
+    # Least-loaded engineer in one round trip: order by a correlated active-ticket count
+    active_tickets = (
+        select(func.count(Ticket.id))
+        .where(
+            Ticket.assigned_engineer_id == User.id,
+            Ticket.status.in_(_ACTIVE_TICKET_STATUSES)
+        )
+        .correlate(User)
+        .scalar_subquery()
+    )
+    return query.order_by(active_tickets, User.id).first()
+
 
-    engineer_ids = [e.id for e in engineers]
-    counts = dict(
+def _active_ticket_counts(db: Session, engineer_ids: List[int]) -> dict:
+    """Assigned/in-progress ticket count per engineer id in one grouped query (engineers with none are absent)."""
+    if not engineer_ids:
+        return {}
+    return dict(
         db.query(Ticket.assigned_engineer_id, func.count(Ticket.id))
         .filter(
             Ticket.assigned_engineer_id.in_(engineer_ids),
-            Ticket.status.in_([TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS])
+            Ticket.status.in_(_ACTIVE_TICKET_STATUSES)
         )
         .group_by(Ticket.assigned_engineer_id)
         .all()
     )
-    return min(engineers, key=lambda e: counts.get(e.id, 0))
 
 
 def _as_extra_dict_esc(value) -> dict:
@@ -213,78 +257,62 @@ def get_state_dashboard(
     """Get state-wide dashboard statistics"""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
+
+    cache_key = ("dashboard", current_user.state_id, current_user.organization_id)
+    cached = state_view_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
     
     # Get all cities in this state only — tickets are scoped to this state's cities
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    city_ids = [city.id for city in cities]
+    city_ids = state_city_ids(db, current_user.state_id)
 
     # Calculate statistics (tickets in this state's cities only; also scoped to org when assigned)
-    base_tickets = db.query(Ticket).filter(Ticket.city_id.in_(city_ids))
+    ticket_scope = [Ticket.city_id.in_(city_ids)]
     if current_user.organization_id:
-        base_tickets = base_tickets.filter(Ticket.organization_id == current_user.organization_id)
-    total_tickets = base_tickets.count()
-    
-    resolved_tickets = db.query(Ticket).filter(
-        Ticket.city_id.in_(city_ids),
-        Ticket.status == TicketStatus.RESOLVED
+        ticket_scope.append(Ticket.organization_id == current_user.organization_id)
+
+    # Repeat visits (devices with more than one ticket) ride along as a scalar subquery
+    repeat_devices = (
+        select(Ticket.device_id)
+        .where(*ticket_scope, Ticket.device_id.isnot(None))
+        .group_by(Ticket.device_id)
+        .having(func.count(Ticket.id) > 1)
+        .subquery()
     )
-    if current_user.organization_id:
-        resolved_tickets = resolved_tickets.filter(Ticket.organization_id == current_user.organization_id)
-    resolved_tickets = resolved_tickets.count()
+    is_resolved = Ticket.status == TicketStatus.RESOLVED
+    # Total, resolved, MTTR (Mean Time To Resolution) and repeat visits in one round trip
+    total_tickets, resolved_tickets, mttr_seconds, repeat_visits = db.query(
+        func.count(Ticket.id),
+        func.sum(case((is_resolved, 1), else_=0)),
+        func.avg(case((
+            and_(is_resolved, Ticket.created_at.isnot(None), Ticket.resolved_at.isnot(None)),
+            seconds_between(Ticket.created_at, Ticket.resolved_at),
+        ))),
+        select(func.count()).select_from(repeat_devices).correlate(None).scalar_subquery(),
+    ).filter(*ticket_scope).one()
+    total_tickets = int(total_tickets or 0)
+    resolved_tickets = int(resolved_tickets or 0)
+    repeat_visits = int(repeat_visits or 0)
     sla_compliance = (resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0
-    
-    # Calculate MTTR (Mean Time To Resolution) from actual ticket data
-    resolved_with_times_q = db.query(Ticket).filter(
-        Ticket.city_id.in_(city_ids),
-        Ticket.status == TicketStatus.RESOLVED,
-        Ticket.created_at.isnot(None),
-        Ticket.resolved_at.isnot(None)
-    )
-    if current_user.organization_id:
-        resolved_with_times_q = resolved_with_times_q.filter(Ticket.organization_id == current_user.organization_id)
-    resolved_with_times = resolved_with_times_q.all()
-    
-    if resolved_with_times:
-        total_time = sum((t.resolved_at - t.created_at).total_seconds() / 3600 for t in resolved_with_times)
-        mttr = max(total_time / len(resolved_with_times), 0.0)
-    else:
-        mttr = 0.0
-    
-    # Count repeat visits (tickets with same device)
-    repeat_q = db.query(
-        Ticket.device_id,
-        func.count(Ticket.id).label('ticket_count')
-    ).filter(
-        Ticket.city_id.in_(city_ids),
-        Ticket.device_id.isnot(None)
-    )
-    if current_user.organization_id:
-        repeat_q = repeat_q.filter(Ticket.organization_id == current_user.organization_id)
-    device_ticket_counts = repeat_q.group_by(Ticket.device_id).having(func.count(Ticket.id) > 1).count()
-    repeat_visits = device_ticket_counts
+    mttr = max(float(mttr_seconds) / 3600, 0.0) if mttr_seconds is not None else 0.0
     
     # Count stockout incidents from inventory transactions
     try:
-        stockout_incidents = db.query(InventoryTransaction).filter(
+        stockout_incidents = db.query(func.count(InventoryTransaction.id)).filter(
             InventoryTransaction.transaction_type == "stockout"
-        ).count()
+        ).scalar()
     except Exception:
         stockout_incidents = 0
 
     # For Indian states, show full city (district) count so StatCard matches full list
-    state_record = db.query(State).filter(State.id == current_user.state_id).first()
-    total_cities_display = len(cities)
-    if state_record:
-        country = db.query(Country).filter(Country.id == state_record.country_id).first()
-        if country:
-            code = (country.code or "").strip().upper()
-            name = (country.name or "").strip().lower()
-            if code in ("IN", "IND") or name == "india" or "india" in name:
-                full_districts = _india_cities_for_state(state_record.name)
-                if full_districts:
-                    total_cities_display = len(full_districts)
+    total_cities_display = len(city_ids)
+    india_state_name = _india_state_name(db, current_user.state_id)
+    if india_state_name:
+        full_districts = _india_cities_for_state(india_state_name)
+        if full_districts:
+            total_cities_display = len(full_districts)
     
-    return {
+    result = {
         "totalCities": total_cities_display,
         "totalTickets": total_tickets,
         "slaCompliance": round(sla_compliance, 2),
@@ -292,32 +320,79 @@ def get_state_dashboard(
         "repeatVisits": repeat_visits,
         "stockoutIncidents": stockout_incidents
     }
+    state_view_cache.set(cache_key, result)
+    return ORJSONResponse(result)
 
 
-def _city_metrics_row(city, db: Session, current_user: User) -> dict:
-    """Build one city row with SLA/MTTR/repeatVisits from DB."""
-    city_tickets_q = db.query(Ticket).filter(Ticket.city_id == city.id)
-    if current_user.organization_id:
-        city_tickets_q = city_tickets_q.filter(Ticket.organization_id == current_user.organization_id)
-    city_tickets = city_tickets_q.all()
-    resolved = [t for t in city_tickets if t.status == TicketStatus.RESOLVED]
-    sla_compliance = (len(resolved) / len(city_tickets) * 100) if city_tickets else 0
-    resolved_with_times = [t for t in resolved if t.created_at and t.resolved_at]
-    if resolved_with_times:
-        total_time = sum((t.resolved_at - t.created_at).total_seconds() / 3600 for t in resolved_with_times)
-        mttr = max(total_time / len(resolved_with_times), 0.0)
-    else:
-        mttr = 0.0
-    device_counts_q = db.query(
-        Ticket.device_id,
-        func.count(Ticket.id).label('count')
-    ).filter(
-        Ticket.city_id == city.id,
-        Ticket.device_id.isnot(None)
+def _city_ticket_metrics(db: Session, city_ids: List[int], organization_id: Optional[int]) -> dict:
+    """Per-city ticket metrics for many cities at once: {city_id: (total, resolved, mttr_seconds, repeat_visits)}."""
+    if not city_ids:
+        return {}
+    ticket_scope = [Ticket.city_id.in_(city_ids)]
+    if organization_id:
+        ticket_scope.append(Ticket.organization_id == organization_id)
+    is_resolved = Ticket.status == TicketStatus.RESOLVED
+    rows = db.query(
+        Ticket.city_id,
+        func.count(Ticket.id),
+        func.sum(case((is_resolved, 1), else_=0)),
+        func.avg(case((
+            and_(is_resolved, Ticket.created_at.isnot(None), Ticket.resolved_at.isnot(None)),
+            seconds_between(Ticket.created_at, Ticket.resolved_at),
+        ))),
+    ).filter(*ticket_scope).group_by(Ticket.city_id).all()
+    if not rows:
+        # No tickets in any of these cities: nothing for the repeat-visit scan to find
+        return {}
+
+    # Repeat visits: devices with more than one ticket in the city, counted per city in SQL
+    repeat_devices = (
+        select(Ticket.city_id, Ticket.device_id)
+        .where(*ticket_scope, Ticket.device_id.isnot(None))
+        .group_by(Ticket.city_id, Ticket.device_id)
+        .having(func.count(Ticket.id) > 1)
+        .subquery()
     )
-    if current_user.organization_id:
-        device_counts_q = device_counts_q.filter(Ticket.organization_id == current_user.organization_id)
-    device_counts = device_counts_q.group_by(Ticket.device_id).having(func.count(Ticket.id) > 1).count()
+    repeat_visits = dict(
+        db.query(repeat_devices.c.city_id, func.count())
+        .select_from(repeat_devices)
+        .group_by(repeat_devices.c.city_id)
+        .all()
+    )
+
+    return {
+        city_id: (int(total or 0), int(resolved or 0), mttr_seconds, repeat_visits.get(city_id, 0))
+        for city_id, total, resolved, mttr_seconds in rows
+    }
+
+
+# Row body for a city with no tickets (including India districts that have no City row yet)
+_EMPTY_CITY_METRICS = {
+    "id": None,
+    "ticketCount": 0,
+    "slaCompliance": 0,
+    "mttr": 0,
+    "repeatVisits": 0,
+    "stockoutIncidents": 0,
+    "status": "critical",
+    "hq_latitude": None,
+    "hq_longitude": None,
+}
+
+
+def _city_metrics_row(city, metrics: dict) -> dict:
+    """Build one city row with SLA/MTTR/repeatVisits from the batched per-city metrics."""
+    if city.id not in metrics:
+        return {
+            **_EMPTY_CITY_METRICS,
+            "id": city.id,
+            "name": city.name,
+            "hq_latitude": getattr(city, "hq_latitude", None),
+            "hq_longitude": getattr(city, "hq_longitude", None),
+        }
+    total, resolved, mttr_seconds, repeat_visits = metrics[city.id]
+    sla_compliance = (resolved / total * 100) if total else 0
+    mttr = max(float(mttr_seconds) / 3600, 0.0) if mttr_seconds is not None else 0.0
     if sla_compliance >= 90:
         status = "healthy"
     elif sla_compliance >= 70:
@@ -327,10 +402,10 @@ def _city_metrics_row(city, db: Session, current_user: User) -> dict:
     return {
         "id": city.id,
         "name": city.name,
-        "ticketCount": len(city_tickets),
+        "ticketCount": total,
         "slaCompliance": round(sla_compliance, 2),
         "mttr": round(mttr, 2),
-        "repeatVisits": device_counts,
+        "repeatVisits": repeat_visits,
         "stockoutIncidents": 0,
         "status": status,
         "hq_latitude": getattr(city, "hq_latitude", None),
@@ -346,24 +421,26 @@ def get_state_cities(
     """Get all cities in the state with performance metrics. For India, returns all districts (zeros if not in DB)."""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
-    
+
+    cache_key = ("cities", current_user.state_id, current_user.organization_id)
+    result = state_view_cache.get(cache_key)
+    if result is None:
+        result = _state_city_rows(db, current_user)
+        state_view_cache.set(cache_key, result)
+    return ORJSONResponse(result)
+
+
+def _state_city_rows(db: Session, current_user: User) -> List[dict]:
+    """Uncached /cities rows for the user's state (and organization, when assigned)."""
     cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    state_record = db.query(State).filter(State.id == current_user.state_id).first()
+    metrics = _city_ticket_metrics(db, [c.id for c in cities], current_user.organization_id)
     result = []
 
     # For Indian states, return all districts so the list is complete
-    is_india = False
-    full_districts = []
-    if state_record:
-        country = db.query(Country).filter(Country.id == state_record.country_id).first()
-        if country:
-            code = (country.code or "").strip().upper()
-            name = (country.name or "").strip().lower()
-            if code in ("IN", "IND") or name == "india" or "india" in name:
-                is_india = True
-                full_districts = _india_cities_for_state(state_record.name)
-
-    if is_india and full_districts:
+    india_state_name = _india_state_name(db, current_user.state_id)
+    full_districts = _india_cities_for_state(india_state_name) if india_state_name else ()
+
+    if full_districts:
         db_city_by_name = {c.name.strip().lower(): c for c in cities}
         added_city_ids = set()  # DB cities we already added (when a district name matched)
         for dist_name in full_districts:
@@ -374,30 +451,19 @@ def get_state_cities(
             if name_lower in db_city_by_name:
                 city = db_city_by_name[name_lower]
                 added_city_ids.add(city.id)
-                result.append(_city_metrics_row(city, db, current_user))
+                result.append(_city_metrics_row(city, metrics))
             else:
-                result.append({
-                    "id": None,
-                    "name": dist_name,
-                    "ticketCount": 0,
-                    "slaCompliance": 0,
-                    "mttr": 0,
-                    "repeatVisits": 0,
-                    "stockoutIncidents": 0,
-                    "status": "critical",
-                    "hq_latitude": None,
-                    "hq_longitude": None,
-                })
+                result.append({**_EMPTY_CITY_METRICS, "name": dist_name})
         # Include any DB city that didn't match a district name (e.g. "Bangalore" vs "Bengaluru Urban")
         # so their ticket counts show in the table and total matches the dashboard.
         for city in cities:
             if city.id not in added_city_ids:
-                result.append(_city_metrics_row(city, db, current_user))
+                result.append(_city_metrics_row(city, metrics))
         return result
 
     # Non-India: only cities present in DB
     for city in cities:
-        result.append(_city_metrics_row(city, db, current_user))
+        result.append(_city_metrics_row(city, metrics))
     return result
 
 
@@ -410,28 +476,51 @@ def get_resource_balancing(
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
     
-    # Get engineers by city
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    
+    # Per-city engineer and active-ticket counts are grouped separately, then LEFT JOINed onto the
+    # state's cities, so one round trip covers every city without an engineers x tickets fan-out
+    state_id = current_user.state_id
+    engineer_counts = (
+        select(
+            User.city_id.label("city_id"),
+            func.count(User.id).label("engineers"),
+            func.sum(case((User.is_available == True, 1), else_=0)).label("available"),
+        )
+        .join(City, City.id == User.city_id)
+        .where(City.state_id == state_id, User.role == UserRole.SUPPORT_ENGINEER)
+        .group_by(User.city_id)
+        .subquery()
+    )
+    active_counts = (
+        select(Ticket.city_id.label("city_id"), func.count(Ticket.id).label("active"))
+        .join(City, City.id == Ticket.city_id)
+        .where(City.state_id == state_id, Ticket.status.in_(_ACTIVE_TICKET_STATUSES))
+        .group_by(Ticket.city_id)
+        .subquery()
+    )
+    rows = (
+        db.query(
+            City.id,
+            City.name,
+            func.coalesce(engineer_counts.c.engineers, 0),
+            func.coalesce(engineer_counts.c.available, 0),
+            func.coalesce(active_counts.c.active, 0),
+        )
+        .outerjoin(engineer_counts, engineer_counts.c.city_id == City.id)
+        .outerjoin(active_counts, active_counts.c.city_id == City.id)
+        .filter(City.state_id == state_id)
+        .all()
+    )
+
     result = []
-    for city in cities:
-        engineers = db.query(User).filter(
-            User.city_id == city.id,
-            User.role == UserRole.SUPPORT_ENGINEER
-        ).all()
-        
-        active_tickets = db.query(Ticket).filter(
-            Ticket.city_id == city.id,
-            Ticket.status.in_(["assigned", "in_progress"])
-        ).count()
-        
+    for city_id, city_name, engineers, available, active_tickets in rows:
+        engineers, active_tickets = int(engineers), int(active_tickets)
         result.append({
-            "cityId": city.id,
-            "cityName": city.name,
-            "engineers": len(engineers),
-            "availableEngineers": len([e for e in engineers if e.is_available]),
+            "cityId": city_id,
+            "cityName": city_name,
+            "engineers": engineers,
+            "availableEngineers": int(available),
             "activeTickets": active_tickets,
-            "workload": active_tickets / len(engineers) if engineers else 0
+            "workload": active_tickets / engineers if engineers else 0
         })
     
     return result
@@ -489,13 +578,11 @@ def transfer_inventory(
         Inventory.organization_id == current_user.organization_id
     ).first()
     
-    state = db.query(State).filter(State.id == current_user.state_id).first()
-    country_id = state.country_id if state else None
+    country_id = db.query(State.country_id).filter(State.id == current_user.state_id).scalar()
 
     if not to_inventory:
         # Create new inventory entry for destination city
-        part = db.query(Part).filter(Part.id == part_id).first()
-        if not part:
+        if not db.query(Part.id).filter(Part.id == part_id).first():
             raise HTTPException(status_code=404, detail="Part not found")
         
         to_inventory = Inventory(
@@ -511,41 +598,53 @@ def transfer_inventory(
         db.add(to_inventory)
         db.flush()
     
-    # Deduct from source
+    # Move the stock with one UPDATE over both rows; the DB derives is_low_stock from the new level.
+    # is_low_stock is assigned first because MySQL evaluates SET left to right against updated values.
+    # The source-row guard makes a concurrent drain fail the transfer instead of going negative.
     from_previous_stock = from_inventory.current_stock
-    from_inventory.current_stock -= quantity
-    from_inventory.is_low_stock = from_inventory.current_stock <= from_inventory.min_threshold
-    
-    # Add to destination
     to_previous_stock = to_inventory.current_stock
-    to_inventory.current_stock += quantity
-    to_inventory.is_low_stock = to_inventory.current_stock <= to_inventory.min_threshold
-    
-    # Create transaction logs from database
-    from_transaction = InventoryTransaction(
-        part_id=part_id,
-        inventory_id=from_inventory.id,
-        transaction_type="out",
-        quantity=quantity,
-        previous_stock=from_previous_stock,
-        new_stock=from_inventory.current_stock,
-        performed_by_id=current_user.id,
-        notes=f"Transferred to city {to_city.name}. {notes}"
-    )
-    
-    to_transaction = InventoryTransaction(
-        part_id=part_id,
-        inventory_id=to_inventory.id,
-        transaction_type="in",
-        quantity=quantity,
-        previous_stock=to_previous_stock,
-        new_stock=to_inventory.current_stock,
-        performed_by_id=current_user.id,
-        notes=f"Transferred from city {from_city.name}. {notes}"
-    )
-    
-    db.add(from_transaction)
-    db.add(to_transaction)
+    new_stock = Inventory.current_stock + case((Inventory.id == from_inventory.id, -quantity), else_=quantity)
+    moved = db.execute(
+        update(Inventory)
+        .where(
+            Inventory.id.in_([from_inventory.id, to_inventory.id]),
+            or_(Inventory.id != from_inventory.id, Inventory.current_stock >= quantity),
+        )
+        .ordered_values(
+            (Inventory.is_low_stock, new_stock <= Inventory.min_threshold),
+            (Inventory.current_stock, new_stock),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if moved != 2:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Source stock changed during transfer, please retry")
+    from_stock_after = from_previous_stock - quantity
+    to_stock_after = to_previous_stock + quantity
+
+    # Create both transaction logs with one executemany INSERT (nothing reads the rows back)
+    db.execute(insert(InventoryTransaction), [
+        dict(
+            part_id=part_id,
+            inventory_id=from_inventory.id,
+            transaction_type="out",
+            quantity=quantity,
+            previous_stock=from_previous_stock,
+            new_stock=from_stock_after,
+            performed_by_id=current_user.id,
+            notes=f"Transferred to city {to_city.name}. {notes}"
+        ),
+        dict(
+            part_id=part_id,
+            inventory_id=to_inventory.id,
+            transaction_type="in",
+            quantity=quantity,
+            previous_stock=to_previous_stock,
+            new_stock=to_stock_after,
+            performed_by_id=current_user.id,
+            notes=f"Transferred from city {from_city.name}. {notes}"
+        ),
+    ])
     db.commit()
     
     return {
@@ -554,8 +653,8 @@ def transfer_inventory(
         "to_city": to_city.name,
         "part_id": part_id,
         "quantity": quantity,
-        "from_stock_after": from_inventory.current_stock,
-        "to_stock_after": to_inventory.current_stock
+        "from_stock_after": from_stock_after,
+        "to_stock_after": to_stock_after
     }
 
 
@@ -571,20 +670,28 @@ def get_state_inventory_parts(
     cities = db.query(City).filter(City.state_id == current_user.state_id).all()
     city_ids = [c.id for c in cities]
 
-    inventory_items = db.query(Inventory).filter(
+    # Inventory and part columns in one JOINed statement: streaming stays safe on an unbuffered cursor
+    # because nothing else runs on the connection until the result is exhausted
+    rows = db.query(
+        Inventory.part_id,
+        Inventory.city_id,
+        Inventory.current_stock,
+        Part.name,
+        Part.sku,
+    ).join(Part, Part.id == Inventory.part_id).filter(
         Inventory.city_id.in_(city_ids),
         Inventory.organization_id == current_user.organization_id
-    ).all()
+    ).order_by(Inventory.id).execution_options(stream_results=True).yield_per(1000)
 
     parts_map = {}
     city_lookup = {c.id: c.name for c in cities}
-    for inv in inventory_items:
+    for inv in rows:
         key = inv.part_id
         if key not in parts_map:
             parts_map[key] = {
                 "part_id": inv.part_id,
-                "part_name": inv.part.name,
-                "sku": inv.part.sku,
+                "part_name": inv.name,
+                "sku": inv.sku,
                 "cities": []
             }
         parts_map[key]["cities"].append({
@@ -612,26 +719,21 @@ def list_engineers_for_reallocation(
     if current_user.organization_id is not None:
         query = query.filter(User.organization_id == current_user.organization_id)
     engineers = query.all()
-    result = []
-    for e in engineers:
-        city_name = None
-        if e.city_id:
-            city = db.query(City).filter(City.id == e.city_id).first()
-            city_name = city.name if city else None
-        assigned = db.query(Ticket).filter(
-            Ticket.assigned_engineer_id == e.id,
-            Ticket.status.in_([TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS])
-        ).count()
-        result.append({
+    counts = _active_ticket_counts(db, [e.id for e in engineers])
+    city_ids = {e.city_id for e in engineers if e.city_id}
+    city_names = dict(db.query(City.id, City.name).filter(City.id.in_(city_ids)).all()) if city_ids else {}
+    return [
+        {
             "id": e.id,
             "full_name": e.full_name,
             "email": e.email,
             "city_id": e.city_id,
-            "city_name": city_name,
-            "assigned_tickets": assigned,
+            "city_name": city_names.get(e.city_id),
+            "assigned_tickets": counts.get(e.id, 0),
             "is_available": e.is_available,
-        })
-    return result
+        }
+        for e in engineers
+    ]
 
 
 @router.post("/engineers/reallocate")
@@ -703,18 +805,22 @@ def get_city_overview(
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
 
-    tickets = db.query(Ticket).filter(Ticket.city_id == city_id).all()
-    total_tickets = len(tickets)
-    resolved = [t for t in tickets if t.status == TicketStatus.RESOLVED]
-    open_tickets = len([t for t in tickets if t.status in [TicketStatus.CREATED, TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS]])
-    sla_compliance = (len(resolved) / total_tickets * 100) if total_tickets else 0
+    # Counts are aggregated in SQL; no ticket rows are transferred
+    total_tickets, resolved_tickets, open_tickets = db.query(
+        func.count(Ticket.id),
+        func.sum(case((Ticket.status == TicketStatus.RESOLVED, 1), else_=0)),
+        func.sum(case((Ticket.status.in_([TicketStatus.CREATED, TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS]), 1), else_=0)),
+    ).filter(Ticket.city_id == city_id).one()
+    total_tickets = int(total_tickets or 0)
+    resolved_tickets = int(resolved_tickets or 0)
+    sla_compliance = (resolved_tickets / total_tickets * 100) if total_tickets else 0
 
     return {
         "city": {"id": city.id, "name": city.name},
         "stats": {
             "total_tickets": total_tickets,
-            "open_tickets": open_tickets,
-            "resolved_tickets": len(resolved),
+            "open_tickets": int(open_tickets or 0),
+            "resolved_tickets": resolved_tickets,
             "sla_compliance": round(sla_compliance, 2)
         }
     }
@@ -723,10 +829,12 @@ def get_city_overview(
 @router.get("/cities/{city_id}/tickets")
 def get_city_tickets(
     city_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
 ):
-    """List tickets for a city"""
+    """List tickets for a city, newest first (paged with skip/limit)"""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
 
@@ -734,8 +842,17 @@ def get_city_tickets(
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
 
-    tickets = db.query(Ticket).filter(Ticket.city_id == city_id).order_by(Ticket.created_at.desc()).all()
-    return [
+    # Plain column rows: no ORM identity map or instrumentation for a read-only listing
+    tickets = db.query(
+        Ticket.id,
+        Ticket.ticket_number,
+        Ticket.status,
+        Ticket.priority,
+        Ticket.issue_category,
+        Ticket.created_at,
+        Ticket.assigned_engineer_id,
+    ).filter(Ticket.city_id == city_id).order_by(Ticket.created_at.desc(), Ticket.id.desc()).offset(skip).limit(limit).all()
+    return ORJSONResponse([
         {
             "id": t.id,
             "ticket_number": t.ticket_number,
@@ -746,7 +863,7 @@ def get_city_tickets(
             "assigned_engineer_id": t.assigned_engineer_id
         }
         for t in tickets
-    ]
+    ])
 
 
 @router.get("/cities/{city_id}/engineers")
@@ -771,23 +888,19 @@ def get_city_engineers(
     if current_user.organization_id is not None:
         query = query.filter(User.organization_id == current_user.organization_id)
     engineers = query.all()
-
-    result = []
-    for engineer in engineers:
-        assigned_tickets = db.query(Ticket).filter(
-            Ticket.assigned_engineer_id == engineer.id,
-            Ticket.status.in_([TicketStatus.ASSIGNED, TicketStatus.IN_PROGRESS])
-        ).count()
-        result.append({
+    counts = _active_ticket_counts(db, [e.id for e in engineers])
+    return [
+        {
             "id": engineer.id,
             "name": engineer.full_name,
             "email": engineer.email,
             "phone": engineer.phone,
             "is_available": engineer.is_available,
             "skill_level": engineer.engineer_skill_level,
-            "assigned_tickets": assigned_tickets
-        })
-    return result
+            "assigned_tickets": counts.get(engineer.id, 0)
+        }
+        for engineer in engineers
+    ]
 
 
 @router.get("/cities/{city_id}/inventory")
@@ -804,23 +917,32 @@ def get_city_inventory(
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
 
-    inventory_items = db.query(Inventory).filter(
+    # Column rows only, materialised: one city's stock list is bounded and the request session closes on return
+    rows = db.query(
+        Inventory.id,
+        Inventory.part_id,
+        Part.name,
+        Part.sku,
+        Inventory.current_stock,
+        Inventory.min_threshold,
+        Inventory.is_low_stock,
+    ).join(Part, Part.id == Inventory.part_id).filter(
         Inventory.city_id == city_id,
         Inventory.organization_id == current_user.organization_id
-    ).all()
+    ).order_by(Inventory.id).all()
 
-    return [
+    return ORJSONResponse([
         {
             "id": inv.id,
             "part_id": inv.part_id,
-            "part_name": inv.part.name,
-            "sku": inv.part.sku,
+            "part_name": inv.name,
+            "sku": inv.sku,
             "current_stock": inv.current_stock,
             "min_threshold": inv.min_threshold,
             "is_low_stock": inv.is_low_stock
         }
-        for inv in inventory_items
-    ]
+        for inv in rows
+    ])
 
 
 @router.post("/cities/{city_id}/hq")
@@ -846,10 +968,12 @@ def update_city_hq_state(
 @router.get("/cities/{city_id}/complaints")
 def get_city_complaints(
     city_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
 ):
-    """List negative feedback for a city"""
+    """List negative feedback for a city, most recently updated first (paged with skip/limit)"""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
 
@@ -857,12 +981,19 @@ def get_city_complaints(
     if not city:
         raise HTTPException(status_code=404, detail="City not found")
 
-    tickets = db.query(Ticket).filter(
+    tickets = db.query(
+        Ticket.id,
+        Ticket.ticket_number,
+        Ticket.customer_rating,
+        Ticket.customer_feedback,
+        Ticket.customer_dispute_tags,
+        Ticket.resolved_at,
+    ).filter(
         Ticket.city_id == city_id,
         Ticket.customer_rating <= 2
-    ).order_by(Ticket.updated_at.desc()).all()
+    ).order_by(Ticket.updated_at.desc(), Ticket.id.desc()).offset(skip).limit(limit).all()
 
-    return [
+    return ORJSONResponse([
         {
             "id": t.id,
             "ticket_number": t.ticket_number,
@@ -872,12 +1003,13 @@ def get_city_complaints(
             "resolved_at": t.resolved_at.isoformat() if t.resolved_at else None
         }
         for t in tickets
-    ]
+    ])
 
 
 @router.post("/complaints/{ticket_id}/follow-up")
 def create_state_complaint_follow_up(
     ticket_id: int,
+    background_tasks: BackgroundTasks,
     follow_up_data: dict = Body(...),
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
@@ -939,13 +1071,15 @@ def create_state_complaint_follow_up(
     db.add(comment)
 
     follow_up_ticket_id = None
+    notification_rows = []
     if create_follow_up_ticket:
         from app.models.ticket import TicketPriority
         follow_up_priority = ticket.priority
         if ticket.sla_breach_risk and ticket.sla_breach_risk > 0.7:
             follow_up_priority = TicketPriority.URGENT
         new_ticket_number = allocate_er_ticket_number(db)
-        follow_up_ticket = Ticket(
+        # Core INSERT: the new id comes back with the statement (lastrowid), no separate ORM flush
+        follow_up_ticket_id = db.execute(insert(Ticket).values(
             ticket_number=new_ticket_number,
             organization_id=ticket.organization_id,
             customer_id=ticket.customer_id,
@@ -970,20 +1104,13 @@ def create_state_complaint_follow_up(
             state_id=ticket.state_id,
             country_id=ticket.country_id,
             follow_up_preferred_date=follow_up_preferred_dt
-        )
-        db.add(follow_up_ticket)
-        db.flush()
-        follow_up_ticket_id = follow_up_ticket.id
+        )).inserted_primary_key[0]
+        mark_state_views_stale(db, ticket.state_id, ticket.organization_id)
 
+        # Customer (per channel) and engineer notifications are inserted after the response, see below
         if ticket.customer_id:
-            channels = [NotificationChannel.IN_APP]
-            if ticket.contact_preferences:
-                if "sms" in ticket.contact_preferences:
-                    channels.append(NotificationChannel.SMS)
-                if "whatsapp" in ticket.contact_preferences:
-                    channels.append(NotificationChannel.WHATSAPP)
-            for channel in channels:
-                notification = Notification(
+            for channel in customer_channels(ticket.contact_preferences):
+                notification_rows.append(dict(
                     organization_id=ticket.organization_id,
                     user_id=ticket.customer_id,
                     notification_type=NotificationType.TICKET_UPDATED,
@@ -993,10 +1120,9 @@ def create_state_complaint_follow_up(
                     ticket_id=follow_up_ticket_id,
                     status=NotificationStatus.PENDING,
                     action_url=f"/customer/ticket/{follow_up_ticket_id}"
-                )
-                db.add(notification)
+                ))
         if assigned_engineer:
-            notification = Notification(
+            notification_rows.append(dict(
                 organization_id=ticket.organization_id,
                 user_id=assigned_engineer.id,
                 notification_type=NotificationType.TICKET_ASSIGNED,
@@ -1006,10 +1132,12 @@ def create_state_complaint_follow_up(
                 ticket_id=follow_up_ticket_id,
                 status=NotificationStatus.PENDING,
                 action_url=f"/engineer/ticket/{follow_up_ticket_id}"
-            )
-            db.add(notification)
+            ))
 
     db.commit()
+    # Fan-out runs after the response on its own session, once the follow-up ticket is committed
+    if notification_rows:
+        background_tasks.add_task(create_follow_up_notifications, notification_rows)
     return {"message": "Follow-up action logged", "follow_up_ticket_id": follow_up_ticket_id}
 
 
@@ -1025,7 +1153,7 @@ def bulk_reassign_tickets_state(
     if not ticket_ids or not engineer_id:
         raise HTTPException(status_code=400, detail="ticket_ids and engineer_id are required")
 
-    engineer = db.query(User).filter(
+    engineer = db.query(User.id).filter(
         User.id == engineer_id,
         User.state_id == current_user.state_id,
         User.role == UserRole.SUPPORT_ENGINEER
@@ -1033,25 +1161,41 @@ def bulk_reassign_tickets_state(
     if not engineer:
         raise HTTPException(status_code=404, detail="Engineer not found in your state")
 
-    tickets = db.query(Ticket).filter(
+    # Only the columns the comments and cache invalidation need; the rows are updated in one statement
+    tickets = db.query(
+        Ticket.id,
+        Ticket.assigned_engineer_id,
+        Ticket.state_id,
+        Ticket.organization_id,
+    ).filter(
         Ticket.id.in_(ticket_ids),
         Ticket.state_id == current_user.state_id
     ).all()
     if not tickets:
         raise HTTPException(status_code=404, detail="No matching tickets found")
 
-    for ticket in tickets:
-        comment = TicketComment(
-            ticket_id=ticket.id,
+    db.execute(insert(TicketComment), [
+        dict(
+            ticket_id=t.id,
             user_id=current_user.id,
-            comment_text=f"Ticket reassigned from engineer {ticket.assigned_engineer_id} to {engineer_id}",
+            comment_text=f"Ticket reassigned from engineer {t.assigned_engineer_id} to {engineer_id}",
             comment_type="reassignment"
         )
-        db.add(comment)
-        ticket.assigned_engineer_id = engineer_id
-        ticket.assigned_by_id = current_user.id
-        ticket.assigned_at = datetime.now(timezone.utc)
-        ticket.status = TicketStatus.ASSIGNED
+        for t in tickets
+    ])
+    db.execute(
+        update(Ticket)
+        .where(Ticket.id.in_([t.id for t in tickets]))
+        .values(
+            assigned_engineer_id=engineer_id,
+            assigned_by_id=current_user.id,
+            assigned_at=datetime.now(timezone.utc),
+            status=TicketStatus.ASSIGNED,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    for t in tickets:
+        mark_state_views_stale(db, t.state_id, t.organization_id)
 
     db.commit()
     return {"message": f"Reassigned {len(tickets)} tickets"}
@@ -1059,6 +1203,7 @@ def bulk_reassign_tickets_state(
 
 @router.get("/sla-risk")
 def get_state_sla_risk(
+    request: Request,
     min_risk: float = 0.4,
     city_id: Optional[int] = None,
     status: Optional[str] = None,
@@ -1071,8 +1216,36 @@ def get_state_sla_risk(
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
 
-    query = db.query(Ticket).filter(
-        Ticket.state_id == current_user.state_id,
+    key = ("sla-risk", current_user.state_id, min_risk, city_id, status, priority, limit)
+    return etag_json_response(request, cached_state_query(
+        key,
+        current_user.state_id,
+        lambda: _state_sla_risk_rows(db, current_user.state_id, min_risk, city_id, status, priority, limit),
+    ))
+
+
+def _state_sla_risk_rows(
+    db: Session,
+    state_id: int,
+    min_risk: float,
+    city_id: Optional[int],
+    status: Optional[str],
+    priority: Optional[str],
+    limit: int,
+) -> List[dict]:
+    """Uncached /sla-risk rows for a state."""
+    query = db.query(
+        Ticket.id,
+        Ticket.ticket_number,
+        Ticket.status,
+        Ticket.priority,
+        Ticket.issue_category,
+        Ticket.sla_breach_risk,
+        Ticket.sla_deadline,
+        Ticket.city_id,
+        Ticket.created_at,
+    ).filter(
+        Ticket.state_id == state_id,
         Ticket.sla_breach_risk.isnot(None),
         Ticket.sla_breach_risk >= min_risk
     )
@@ -1111,33 +1284,40 @@ def get_state_sla_risk(
 
 @router.get("/compliance-alerts")
 def get_state_compliance_alerts(
+    request: Request,
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
 ):
     """Return compliance alerts for cities with high SLA risk ratios"""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
+    return etag_json_response(request, cached_state_query(
+        ("compliance-alerts", current_user.state_id),
+        current_user.state_id,
+        lambda: _state_compliance_alerts(db, current_user.state_id),
+    ))
+
+
+def _state_compliance_alerts(db: Session, state_id: int) -> List[dict]:
+    """Uncached /compliance-alerts rows for a state."""
+    # Per-city total and at-risk counts (covered by ix_tickets_city_sla_risk); only alerting cities come back:
+    # at least 5 tickets with at_risk / total >= 0.2, compared in integers as at_risk * 5 >= total
+    total = func.count(Ticket.id)
+    at_risk = func.sum(case((Ticket.sla_breach_risk >= 0.7, 1), else_=0))
+    rows = db.query(City.id, City.name, total, at_risk).join(Ticket, Ticket.city_id == City.id).filter(
+        City.state_id == state_id
+    ).group_by(City.id, City.name).having(total >= 5, at_risk * 5 >= total).all()
 
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    alerts = []
-    for city in cities:
-        total = db.query(Ticket).filter(Ticket.city_id == city.id).count()
-        at_risk = db.query(Ticket).filter(
-            Ticket.city_id == city.id,
-            Ticket.sla_breach_risk.isnot(None),
-            Ticket.sla_breach_risk >= 0.7
-        ).count()
-        ratio = (at_risk / total) if total else 0
-        if ratio >= 0.2 and total >= 5:
-            alerts.append({
-                "city_id": city.id,
-                "city_name": city.name,
-                "at_risk": at_risk,
-                "total": total,
-                "ratio": round(ratio * 100, 2)
-            })
-
-    return alerts
+    return [
+        {
+            "city_id": city_id,
+            "city_name": city_name,
+            "at_risk": int(city_at_risk),
+            "total": city_total,
+            "ratio": round(int(city_at_risk) / city_total * 100, 2)
+        }
+        for city_id, city_name, city_total, city_at_risk in rows
+    ]
 
 
 @router.post("/demand-forecast")
@@ -1172,24 +1352,23 @@ def simulate_policy_impact(
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
     target_hours = float(payload.get("target_hours", 24))
 
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    city_ids = [c.id for c in cities]
-    tickets = db.query(Ticket).filter(Ticket.city_id.in_(city_ids)).all()
+    # Breach counts for the state's tickets in one aggregate; open tickets are measured up to now
+    now = datetime.now(timezone.utc)
+    total, current_breaches, predicted_breaches = db.query(
+        func.count(Ticket.id),
+        func.sum(case((Ticket.resolved_at > Ticket.sla_deadline, 1), else_=0)),
+        func.sum(case((
+            seconds_between(Ticket.created_at, func.coalesce(Ticket.resolved_at, now)) > target_hours * 3600, 1
+        ), else_=0)),
+    ).filter(
+        Ticket.city_id.in_(state_city_ids(db, current_user.state_id))
+    ).one()
 
-    if not tickets:
+    if not total:
         return {"predicted_breach_rate": 0, "current_breach_rate": 0}
 
-    def is_breach(t: Ticket, hours: float) -> bool:
-        end_time = t.resolved_at or datetime.now(timezone.utc)
-        if not t.created_at:
-            return False
-        elapsed = (end_time - t.created_at).total_seconds() / 3600
-        return elapsed > hours
-
-    current_breaches = len([t for t in tickets if t.sla_deadline and t.resolved_at and t.resolved_at > t.sla_deadline])
-    current_breach_rate = (current_breaches / len(tickets)) * 100
-    predicted_breaches = len([t for t in tickets if is_breach(t, target_hours)])
-    predicted_breach_rate = (predicted_breaches / len(tickets)) * 100
+    current_breach_rate = (int(current_breaches or 0) / total) * 100
+    predicted_breach_rate = (int(predicted_breaches or 0) / total) * 100
 
     return {
         "current_breach_rate": round(current_breach_rate, 2),
@@ -1206,33 +1385,28 @@ def get_training_gaps(
     """Detect training gaps based on repeat visits"""
     if not current_user.state_id:
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
-    cities = db.query(City).filter(City.state_id == current_user.state_id).all()
-    city_ids = [c.id for c in cities]
-
-    followups = db.query(Ticket).filter(
+    city_ids = state_city_ids(db, current_user.state_id)
+
+    # Follow-up tickets and distinct engineers per skill level, grouped in SQL (inner join drops deleted engineers)
+    rows = db.query(
+        User.engineer_skill_level,
+        func.count(Ticket.id),
+        func.count(func.distinct(User.id)),
+    ).join(
+        Ticket, Ticket.assigned_engineer_id == User.id
+    ).filter(
         Ticket.city_id.in_(city_ids),
-        Ticket.parent_ticket_id.isnot(None),
-        Ticket.assigned_engineer_id.isnot(None)
-    ).all()
+        Ticket.parent_ticket_id.isnot(None)
+    ).group_by(User.engineer_skill_level).order_by(User.engineer_skill_level).all()
 
+    # Engineers without a skill level report as "unknown" (an engineer has one level, so counts just add)
     stats = {}
-    for t in followups:
-        engineer = db.query(User).filter(User.id == t.assigned_engineer_id).first()
-        if not engineer:
-            continue
-        key = engineer.engineer_skill_level or "unknown"
-        stats.setdefault(key, {"skill_level": key, "repeat_visits": 0, "engineers": set()})
-        stats[key]["repeat_visits"] += 1
-        stats[key]["engineers"].add(engineer.id)
-
-    return [
-        {
-            "skill_level": s["skill_level"],
-            "repeat_visits": s["repeat_visits"],
-            "engineers": len(s["engineers"])
-        }
-        for s in stats.values()
-    ]
+    for skill_level, repeat_visits, engineers in rows:
+        key = skill_level or "unknown"
+        entry = stats.setdefault(key, {"skill_level": key, "repeat_visits": 0, "engineers": 0})
+        entry["repeat_visits"] += repeat_visits
+        entry["engineers"] += engineers
+    return list(stats.values())
 
 
 @router.get("/demand-forecast")
@@ -1246,26 +1420,26 @@ def get_state_demand_forecast(
         raise HTTPException(status_code=400, detail="User must be assigned to a state")
 
     since = datetime.now(timezone.utc) - timedelta(days=90)
-    transactions = db.query(InventoryTransaction).join(Inventory).filter(
+    # Top 5 parts by 90-day outbound quantity, summed in SQL; names fetched for just those parts
+    usage = func.sum(InventoryTransaction.quantity)
+    top_parts = db.query(InventoryTransaction.part_id, usage).join(Inventory).filter(
         Inventory.state_id == current_user.state_id,
         InventoryTransaction.transaction_type == "out",
         InventoryTransaction.created_at >= since
-    ).all()
+    ).group_by(InventoryTransaction.part_id).order_by(usage.desc(), InventoryTransaction.part_id).limit(5).all()
+    part_names = dict(
+        db.query(Part.id, Part.name).filter(Part.id.in_([part_id for part_id, _qty in top_parts])).all()
+    ) if top_parts else {}
 
-    usage = {}
-    for tx in transactions:
-        usage[tx.part_id] = usage.get(tx.part_id, 0) + tx.quantity
-
-    top_parts = sorted(usage.items(), key=lambda x: x[1], reverse=True)[:5]
     forecasts = []
     for part_id, qty in top_parts:
-        part = db.query(Part).filter(Part.id == part_id).first()
+        qty = int(qty or 0)
         avg_per_day = qty / 90 if qty else 0
         avg_per_week = avg_per_day * 7
         forecast_qty = round(avg_per_day * days, 2)
         forecasts.append({
             "part_id": part_id,
-            "part_name": part.name if part else f"Part {part_id}",
+            "part_name": part_names.get(part_id) or f"Part {part_id}",
             "forecast_days": days,
             "predicted_demand": forecast_qty,
             "weekly_forecast": [round(avg_per_week, 2)] * 4
@@ -1274,83 +1448,9 @@ def get_state_demand_forecast(
     return forecasts
 
 
-@router.post("/policy-impact")
-def simulate_policy_impact(
-    payload: dict = Body(...),
-    current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
-    db: Session = Depends(get_db)
-):
-    """Simulate SLA policy impact on compliance"""
-    if not current_user.state_id:
-        raise HTTPException(status_code=400, detail="User must be assigned to a state")
-
-    target_hours = float(payload.get("target_hours", 24))
-    tickets = db.query(Ticket).filter(
-        Ticket.state_id == current_user.state_id,
-        Ticket.resolved_at.isnot(None),
-        Ticket.created_at.isnot(None)
-    ).all()
-
-    compliant = 0
-    for t in tickets:
-        hours = (t.resolved_at - t.created_at).total_seconds() / 3600
-        if hours <= target_hours:
-            compliant += 1
-
-    total = len(tickets)
-    compliance_rate = round((compliant / total) * 100, 2) if total else 0
-    projected_breaches = max(total - compliant, 0)
-    estimated_penalty = projected_breaches * 200
-
-    return {
-        "target_hours": target_hours,
-        "total_tickets": total,
-        "compliance_rate": compliance_rate,
-        "projected_breaches": projected_breaches,
-        "estimated_penalty": estimated_penalty
-    }
-
-
-@router.get("/training-gaps")
-def get_training_gaps(
-    current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
-    db: Session = Depends(get_db)
-):
-    """Identify engineers with high repeat visits or low ratings"""
-    if not current_user.state_id:
-        raise HTTPException(status_code=400, detail="User must be assigned to a state")
-
-    engineers = db.query(User).filter(
-        User.state_id == current_user.state_id,
-        User.role == UserRole.SUPPORT_ENGINEER
-    ).all()
-
-    results = []
-    for engineer in engineers:
-        tickets = db.query(Ticket).filter(Ticket.assigned_engineer_id == engineer.id).all()
-        total = len(tickets)
-        follow_ups = len([t for t in tickets if t.parent_ticket_id])
-        avg_rating = None
-        ratings = [t.customer_rating for t in tickets if t.customer_rating]
-        if ratings:
-            avg_rating = round(sum(ratings) / len(ratings), 2)
-        follow_up_rate = (follow_ups / total) if total else 0
-
-        if follow_up_rate >= 0.2 or (avg_rating is not None and avg_rating < 3.5):
-            results.append({
-                "engineer_id": engineer.id,
-                "engineer_name": engineer.full_name,
-                "skill_level": engineer.engineer_skill_level,
-                "follow_up_rate": round(follow_up_rate * 100, 2),
-                "avg_rating": avg_rating,
-                "total_tickets": total
-            })
-
-    return results
-
-
 @router.get("/sla-policies")
 def list_state_sla_policies(
+    request: Request,
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
 ):
@@ -1363,7 +1463,7 @@ def list_state_sla_policies(
         SLAPolicy.state_id == current_user.state_id
     ).all()
 
-    return [
+    return etag_json_response(request, [
         {
             "id": p.id,
             "sla_type": sla_type_to_api(p.sla_type),
@@ -1376,7 +1476,7 @@ def list_state_sla_policies(
             "is_active": p.is_active
         }
         for p in policies
-    ]
+    ])
 
 
 @router.post("/sla-policies")
@@ -1490,6 +1590,7 @@ def delete_state_sla_policy(
 
 @router.get("/service-policies")
 def list_state_service_policies(
+    request: Request,
     current_user: User = Depends(require_role([UserRole.STATE_ADMIN])),
     db: Session = Depends(get_db)
 ):
@@ -1502,7 +1603,7 @@ def list_state_service_policies(
         ServicePolicy.state_id == current_user.state_id
     ).all()
 
-    return [
+    return etag_json_response(request, [
         {
             "id": p.id,
             "policy_type": p.policy_type,
@@ -1513,7 +1614,7 @@ def list_state_service_policies(
             "is_active": p.is_active
         }
         for p in policies
-    ]
+    ])
 
 
 @router.post("/service-policies")
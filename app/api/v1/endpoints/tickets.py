@@ -2,14 +2,17 @@
 Ticket endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Response, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy import insert, or_
 from typing import List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
+import asyncio
 import logging
 import os
 import random
 import re
+import shutil
 import string
 import uuid
 
@@ -40,10 +43,13 @@ from app.models.product import Product
 from app.models.organization import Organization
 from app.models.warranty import Warranty, WarrantyStatus
 from app.models.escalation import Escalation, EscalationLevel, EscalationType
-from app.models.notification import Notification, NotificationType, NotificationChannel, NotificationStatus
+from app.models.notification import Notification, NotificationType, NotificationStatus
+from app.schemas.ticket import TicketEtaUpdate, TicketResolve
 from app.services.ai.sentiment_analyzer import SentimentAnalyzerService
 from app.services.ai.case_triage import CaseTriageService
 from app.services.ai.sla_prediction import SLABreachPredictionService
+from app.services.engineer_locations import engineer_location
+from app.services.notification_channels import customer_channels
 from app.services.policy_matcher import PolicyMatcherService
 from app.services.ticket_numbering import allocate_er_ticket_number
 from app.models.sla_policy import SLAType
@@ -138,7 +144,8 @@ def _device_service_profile_dict(db: Session, device: Device) -> dict:
         "customer": _customer_lookup_mini(owner) if owner else None,
     }
 
-router = APIRouter()
+# Ticket payloads are dicts of primitives and datetimes, which orjson encodes natively and much faster
+router = APIRouter(default_response_class=ORJSONResponse)
 triage_service = CaseTriageService()
 sla_service = SLABreachPredictionService()
 sentiment_service = SentimentAnalyzerService()
@@ -223,7 +230,23 @@ def _ticket_start_approval_for_response(db: Session, ticket_id: int) -> Optional
     }
 
 
-def build_status_timeline(ticket: Ticket, follow_up_comments: Optional[List[TicketComment]] = None):
+# Timeline entries for comment types with a fixed label; reschedule_request carries its date
+_COMMENT_TIMELINE_LABELS = {
+    "part_ordered": "Part ordered",
+    "part_received": "Part received",
+    "parts_approval": "Parts approved",
+    "parts_rejection": "Parts rejected",
+    "arrival": "Engineer arrived",
+    "resolution": "Resolution updated",
+}
+
+
+def build_status_timeline(
+    ticket: Ticket,
+    follow_up_comments: Optional[List[TicketComment]] = None,
+    *,
+    include_comment_events: bool = True,
+):
     timeline = [
         ("Ticket created", ticket.created_at),
         ("Assigned to engineer", ticket.assigned_at),
@@ -243,45 +266,33 @@ def build_status_timeline(ticket: Ticket, follow_up_comments: Optional[List[Tick
             "completed": completed
         })
 
+    if not include_comment_events:
+        return result
+
     comments = follow_up_comments or ticket.comments or []
     for comment in comments:
-        if comment.comment_type == "reschedule_request":
+        label = _COMMENT_TIMELINE_LABELS.get(comment.comment_type)
+        if label:
+            result.append({"label": label, "completed": True})
+        elif comment.comment_type == "reschedule_request":
             preferred_date = (comment.extra_data or {}).get("preferred_date")
             label = f"Visit rescheduled ({preferred_date})" if preferred_date else "Visit rescheduled"
             result.append({"label": label, "completed": True})
-        elif comment.comment_type == "part_ordered":
-            result.append({"label": "Part ordered", "completed": True})
-        elif comment.comment_type == "part_received":
-            result.append({"label": "Part received", "completed": True})
-        elif comment.comment_type == "parts_approval":
-            result.append({"label": "Parts approved", "completed": True})
-        elif comment.comment_type == "parts_rejection":
-            result.append({"label": "Parts rejected", "completed": True})
-        elif comment.comment_type == "arrival":
-            result.append({"label": "Engineer arrived", "completed": True})
-        elif comment.comment_type == "resolution":
-            result.append({"label": "Resolution updated", "completed": True})
 
     return result
 
 
-def _queue_customer_notifications(
-    db: Session,
+def _customer_notification_rows(
     ticket: Ticket,
     title: str,
     message: str,
     notification_type: NotificationType
-):
+) -> List[dict]:
+    """Notification column dicts for the ticket's customer: in-app plus any SMS/WhatsApp preference."""
     if not ticket.customer_id:
-        return
-    channels = [NotificationChannel.IN_APP]
-    if ticket.contact_preferences:
-        if "sms" in ticket.contact_preferences:
-            channels.append(NotificationChannel.SMS)
-        if "whatsapp" in ticket.contact_preferences:
-            channels.append(NotificationChannel.WHATSAPP)
-    for channel in channels:
-        notification = Notification(
+        return []
+    return [
+        dict(
             organization_id=ticket.organization_id,
             user_id=ticket.customer_id,
             notification_type=notification_type,
@@ -292,7 +303,24 @@ def _queue_customer_notifications(
             status=NotificationStatus.PENDING,
             action_url=f"/customer/ticket/{ticket.id}"
         )
-        db.add(notification)
+        for channel in customer_channels(ticket.contact_preferences)
+    ]
+
+
+def _queue_customer_notifications(
+    db: Session,
+    ticket: Ticket,
+    title: str,
+    message: str,
+    notification_type: NotificationType
+):
+    rows = _customer_notification_rows(ticket, title, message, notification_type)
+    if rows:
+        # One executemany INSERT for all channels (nothing reads the rows back)
+        db.execute(insert(Notification), rows)
+
+
+_UPLOAD_CHUNK = 1 << 20
 
 
 def _save_upload_file(upload: UploadFile, subdir: str) -> str:
@@ -303,7 +331,8 @@ def _save_upload_file(upload: UploadFile, subdir: str) -> str:
     filename = f"{uuid.uuid4().hex}{ext}"
     file_path = os.path.join(base_dir, filename)
     with open(file_path, "wb") as f:
-        f.write(upload.file.read())
+        # Copy in 1 MB chunks so large photos never sit in memory whole
+        shutil.copyfileobj(upload.file, f, _UPLOAD_CHUNK)
     return f"/uploads/{subdir}/{filename}"
 
 
@@ -320,9 +349,9 @@ def upload_ticket_attachment(
     return {"url": url, "filename": file.filename, "uploaded_by": current_user.id}
 
 
-def _ticket_or_404(db: Session, ticket_id: int, current_user: User) -> Ticket:
+def _ticket_or_404(db: Session, ticket_id: int, current_user: User, *options) -> Ticket:
     """Load a ticket only if the current user may access it (same rules as GET /tickets/{id})."""
-    ticket = get_ticket_if_accessible(db, ticket_id, current_user)
+    ticket = get_ticket_if_accessible(db, ticket_id, current_user, *options)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
@@ -489,9 +518,7 @@ async def create_ticket(
         if device.organization_id:
             organization_id = organization_id or device.organization_id
         if not organization_id and device.product_id:
-            prod = db.query(Product).filter(Product.id == device.product_id).first()
-            if prod and prod.organization_id:
-                organization_id = prod.organization_id
+            organization_id = db.query(Product.organization_id).filter(Product.id == device.product_id).scalar()
 
     if not organization_id:
         raise HTTPException(
@@ -680,6 +707,18 @@ async def create_ticket(
     }
 
 
+_LIST_TICKET_COLUMNS = (
+    Ticket.id, Ticket.ticket_number, Ticket.status, Ticket.priority, Ticket.issue_category,
+    Ticket.issue_description, Ticket.created_at, Ticket.assigned_engineer_id, Ticket.customer_id,
+    Ticket.service_address, Ticket.service_latitude, Ticket.service_longitude,
+    Ticket.warranty_status, Ticket.is_chargeable, Ticket.preferred_time_slots, Ticket.contact_preferences,
+    Ticket.parent_ticket_id, Ticket.follow_up_preferred_date, Ticket.sla_deadline,
+    Ticket.customer_name, Ticket.customer_company, Ticket.customer_phone,
+    # build_status_timeline
+    Ticket.assigned_at, Ticket.started_at, Ticket.resolved_at, Ticket.closed_at,
+)
+
+
 @router.get("/", response_model=List[dict])
 def list_tickets(
     status_filter: Optional[TicketStatus] = None,
@@ -693,8 +732,10 @@ def list_tickets(
     db: Session = Depends(get_db)
 ):
     """List tickets based on user role and permissions"""
+    # Only the columns serialized below; customer feeds the name/phone fallback
     query = apply_ticket_query_scope(
-        db.query(Ticket), current_user, db, assigned_to_me=assigned_to_me
+        db.query(Ticket).options(load_only(*_LIST_TICKET_COLUMNS), selectinload(Ticket.customer)),
+        current_user, db, assigned_to_me=assigned_to_me
     )
 
     # Apply filters
@@ -707,9 +748,10 @@ def list_tickets(
     if state_id:
         query = query.filter(Ticket.state_id == state_id)
     
-    tickets = query.offset(skip).limit(limit).all()
+    # Newest first; the created_at composites (and InnoDB's implicit trailing id) serve filter and sort
+    tickets = query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).offset(skip).limit(limit).all()
     
-    return [
+    return ORJSONResponse([
         {
             "id": t.id,
             "ticket_number": t.ticket_number,
@@ -717,7 +759,7 @@ def list_tickets(
             "priority": t.priority.value,
             "issue_category": t.issue_category,
             "issue_description": t.issue_description,
-            "created_at": t.created_at.isoformat(),
+            "created_at": t.created_at,
             "assigned_engineer_id": t.assigned_engineer_id,
             "service_address": t.service_address,
             "service_latitude": t.service_latitude,
@@ -726,17 +768,18 @@ def list_tickets(
             "is_chargeable": t.is_chargeable,
             "preferred_time_slots": t.preferred_time_slots or [],
             "contact_preferences": t.contact_preferences or [],
-            "status_timeline": build_status_timeline(t),
+            # Milestones only; comment-driven entries (parts, reschedules) are in the ticket detail
+            "status_timeline": build_status_timeline(t, include_comment_events=False),
             "parent_ticket_id": t.parent_ticket_id,
-            "follow_up_preferred_date": t.follow_up_preferred_date.isoformat() if t.follow_up_preferred_date else None,
-            "sla_deadline": t.sla_deadline.isoformat() if t.sla_deadline else None,
+            "follow_up_preferred_date": t.follow_up_preferred_date,
+            "sla_deadline": t.sla_deadline,
             "customer_name": t.customer_name or (t.customer.full_name if t.customer else None),
             "customer_company": t.customer_company,
             "customer_phone": t.customer_phone or (t.customer.phone if t.customer else None),
             "parts_ready": t.status != TicketStatus.WAITING_PARTS
         }
         for t in tickets
-    ]
+    ])
 
 
 @router.get("/service-lookup")
@@ -841,20 +884,32 @@ async def get_ticket(
     db: Session = Depends(get_db)
 ):
     """Get ticket details"""
-    ticket = _ticket_or_404(db, ticket_id, current_user)
+    # The session is sync: load and serialize off the event loop, only the prediction runs here
+    ticket, detail = await asyncio.to_thread(_ticket_detail, db, ticket_id, current_user)
 
     # Get SLA breach prediction
     if ticket.sla_deadline:
-        sla_prediction = await sla_service.predict_breach_risk(
+        detail["sla_prediction"] = await sla_service.predict_breach_risk(
             ticket_id=ticket.id,
             current_status=ticket.status.value,
             sla_deadline=ticket.sla_deadline,
             created_at=ticket.created_at,
             assigned_at=ticket.assigned_at
         )
-    else:
-        sla_prediction = None
-    
+    return ORJSONResponse(detail)
+
+
+def _ticket_detail(db: Session, ticket_id: int, current_user: User) -> Tuple[Ticket, dict]:
+    """Accessible ticket and its detail payload (sla_prediction left as None for the caller)."""
+    ticket = _ticket_or_404(
+        db, ticket_id, current_user,
+        joinedload(Ticket.customer),
+        joinedload(Ticket.assigned_engineer),
+        joinedload(Ticket.parent_ticket),
+        joinedload(Ticket.device).joinedload(Device.product_model),
+        selectinload(Ticket.follow_up_tickets),
+    )
+
     follow_up_comments = db.query(TicketComment).filter(
         TicketComment.ticket_id == ticket.id,
         TicketComment.comment_type == "follow_up"
@@ -866,23 +921,23 @@ async def get_ticket(
             "preferred_date": (c.extra_data or {}).get("preferred_date"),
             "goodwill": (c.extra_data or {}).get("goodwill"),
             "notes": c.comment_text,
-            "created_at": c.created_at.isoformat() if c.created_at else None
+            "created_at": c.created_at
         }
         for c in follow_up_comments
     ]
     
-    return {
+    return ticket, {
         "id": ticket.id,
         "ticket_number": ticket.ticket_number,
         "status": ticket.status.value,
         "priority": ticket.priority.value,
         "city_id": ticket.city_id,
         "state_id": ticket.state_id,
-        "created_at": ticket.created_at.isoformat() if ticket.created_at else None,
-        "sla_deadline": ticket.sla_deadline.isoformat() if ticket.sla_deadline else None,
-        "resolved_at": ticket.resolved_at.isoformat() if ticket.resolved_at else None,
+        "created_at": ticket.created_at,
+        "sla_deadline": ticket.sla_deadline,
+        "resolved_at": ticket.resolved_at,
         "parent_ticket_id": ticket.parent_ticket_id,
-        "follow_up_preferred_date": ticket.follow_up_preferred_date.isoformat() if ticket.follow_up_preferred_date else None,
+        "follow_up_preferred_date": ticket.follow_up_preferred_date,
         "issue_description": ticket.issue_description,
         "issue_photos": ticket.issue_photos or [],
         "issue_language": ticket.issue_language,
@@ -922,14 +977,14 @@ async def get_ticket(
         "parts_used": ticket.parts_used or [],
         "resolution_notes": ticket.resolution_notes,
         "resolution_photos": ticket.resolution_photos or [],
-        "engineer_eta_start": ticket.engineer_eta_start.isoformat() if ticket.engineer_eta_start else None,
-        "engineer_eta_end": ticket.engineer_eta_end.isoformat() if ticket.engineer_eta_end else None,
-        "arrival_confirmed_at": ticket.arrival_confirmed_at.isoformat() if ticket.arrival_confirmed_at else None,
+        "engineer_eta_start": ticket.engineer_eta_start,
+        "engineer_eta_end": ticket.engineer_eta_end,
+        "arrival_confirmed_at": ticket.arrival_confirmed_at,
         "arrival_latitude": ticket.arrival_latitude,
         "arrival_longitude": ticket.arrival_longitude,
         "customer_otp_verified": bool(ticket.customer_otp_verified),
-        "otp_start_verified_at": ticket.otp_start_verified_at.isoformat() if getattr(ticket, "otp_start_verified_at", None) else None,
-        "otp_complete_verified_at": ticket.otp_complete_verified_at.isoformat() if getattr(ticket, "otp_complete_verified_at", None) else None,
+        "otp_start_verified_at": getattr(ticket, "otp_start_verified_at", None),
+        "otp_complete_verified_at": getattr(ticket, "otp_complete_verified_at", None),
         "customer_rating": ticket.customer_rating,
         "customer_feedback": ticket.customer_feedback,
         "customer_dispute_tags": ticket.customer_dispute_tags or [],
@@ -938,7 +993,7 @@ async def get_ticket(
             "confidence": ticket.ai_triage_confidence,
             "suggested_parts": ticket.ai_suggested_parts
         },
-        "sla_prediction": sla_prediction,
+        "sla_prediction": None,
         "status_timeline": build_status_timeline(ticket, follow_up_comments),
         "follow_up_actions": follow_up_actions,
         "parent_ticket": {
@@ -951,7 +1006,7 @@ async def get_ticket(
                 "id": t.id,
                 "ticket_number": t.ticket_number,
                 "status": t.status.value,
-                "follow_up_preferred_date": t.follow_up_preferred_date.isoformat() if t.follow_up_preferred_date else None
+                "follow_up_preferred_date": t.follow_up_preferred_date
             }
             for t in ticket.follow_up_tickets
         ] if ticket.follow_up_tickets else [],
@@ -966,14 +1021,16 @@ def get_ticket_tracking(
     db: Session = Depends(get_db)
 ):
     """Get assigned engineer live location for customer"""
-    ticket = _ticket_or_404(db, ticket_id, current_user)
-    if not ticket.assigned_engineer:
+    # Polled every few seconds while the engineer is on the way: access check on two columns, location cached
+    ticket = _ticket_or_404(db, ticket_id, current_user, load_only(Ticket.id, Ticket.assigned_engineer_id))
+    location = engineer_location(db, ticket.assigned_engineer_id) if ticket.assigned_engineer_id else None
+    if location is None:
         raise HTTPException(status_code=400, detail="Engineer not assigned")
 
     return {
-        "engineer_id": ticket.assigned_engineer.id,
-        "latitude": ticket.assigned_engineer.current_location_lat,
-        "longitude": ticket.assigned_engineer.current_location_lng
+        "engineer_id": ticket.assigned_engineer_id,
+        "latitude": location[0],
+        "longitude": location[1]
     }
 
 
@@ -986,10 +1043,12 @@ def get_ticket_estimate(
     """Estimate cost based on suggested parts and warranty"""
     ticket = _ticket_or_404(db, ticket_id, current_user)
 
-    org = None
+    warranty_policy = None
     if ticket.organization_id:
-        org = db.query(Organization).filter(Organization.id == ticket.organization_id).first()
-    wp = org.warranty_policy if (org and isinstance(org.warranty_policy, dict)) else {}
+        warranty_policy = (
+            db.query(Organization.warranty_policy).filter(Organization.id == ticket.organization_id).scalar()
+        )
+    wp = warranty_policy if isinstance(warranty_policy, dict) else {}
     lc = wp.get("fixed_labour_charges") if isinstance(wp.get("fixed_labour_charges"), dict) else {}
     in_warranty_labour = lc.get("in_warranty", 0)
     off_warranty_labour = lc.get("off_warranty", 300)
@@ -1011,21 +1070,23 @@ def get_ticket_estimate(
         }
 
     labour_cost = in_warranty_labour if ticket.warranty_status == "in_warranty" else off_warranty_labour
-    part_ids = []
-    for item in ticket.ai_suggested_parts or []:
-        if isinstance(item, dict) and item.get("part_id"):
-            part_ids.append(item["part_id"])
-        elif isinstance(item, int):
-            part_ids.append(item)
-
-    parts = db.query(Part).filter(Part.id.in_(part_ids)).all() if part_ids else []
+    part_ids = [
+        item["part_id"] if isinstance(item, dict) else item
+        for item in ticket.ai_suggested_parts or []
+        if (isinstance(item, dict) and item.get("part_id")) or isinstance(item, int)
+    ]
+
+    parts = (
+        db.query(Part.id, Part.name, Part.selling_price).filter(Part.id.in_(part_ids)).all()
+        if part_ids else []
+    )
     parts_breakdown = [
         {
-            "part_id": p.id,
-            "part_name": p.name,
-            "price": p.selling_price or 0
+            "part_id": part_id,
+            "part_name": name,
+            "price": selling_price or 0
         }
-        for p in parts
+        for part_id, name, selling_price in parts
     ]
     parts_total = sum(p["price"] for p in parts_breakdown)
     total = parts_total + labour_cost
@@ -1089,7 +1150,7 @@ def assign_ticket(
 @router.post("/{ticket_id}/start")
 def start_ticket(
     ticket_id: int,
-    start_data: dict = Body(default={}),
+    start_data: Optional[TicketEtaUpdate] = None,
     current_user: User = Depends(require_role([UserRole.SUPPORT_ENGINEER])),
     db: Session = Depends(get_db)
 ):
@@ -1101,47 +1162,28 @@ def start_ticket(
     
     ticket.status = TicketStatus.IN_PROGRESS
     ticket.started_at = datetime.utcnow()
-    eta_start = start_data.get("eta_start")
-    eta_end = start_data.get("eta_end")
-    if eta_start:
-        try:
-            ticket.engineer_eta_start = datetime.fromisoformat(eta_start.replace('Z', '+00:00'))
-        except Exception:
-            pass
-    if eta_end:
-        try:
-            ticket.engineer_eta_end = datetime.fromisoformat(eta_end.replace('Z', '+00:00'))
-        except Exception:
-            pass
-
-    _queue_customer_notifications(
-        db,
+    start_data = start_data or TicketEtaUpdate()
+    if start_data.eta_start:
+        ticket.engineer_eta_start = start_data.eta_start
+    if start_data.eta_end:
+        ticket.engineer_eta_end = start_data.eta_end
+
+    # "Work started" and (when set) the ETA update go out in one INSERT
+    notification_rows = _customer_notification_rows(
         ticket,
         title="Work started",
         message="Your engineer has started working on your ticket.",
         notification_type=NotificationType.TICKET_UPDATED
     )
-    
-    if ticket.customer_id and (ticket.engineer_eta_start or ticket.engineer_eta_end):
-        channels = [NotificationChannel.IN_APP]
-        if ticket.contact_preferences:
-            if "sms" in ticket.contact_preferences:
-                channels.append(NotificationChannel.SMS)
-            if "whatsapp" in ticket.contact_preferences:
-                channels.append(NotificationChannel.WHATSAPP)
-        for channel in channels:
-            notification = Notification(
-                organization_id=ticket.organization_id,
-                user_id=ticket.customer_id,
-                notification_type=NotificationType.ENGINEER_ETA,
-                channel=channel,
-                title="Engineer ETA updated",
-                message="Your engineer has shared an updated ETA.",
-                ticket_id=ticket.id,
-                status=NotificationStatus.PENDING,
-                action_url=f"/customer/ticket/{ticket.id}"
-            )
-            db.add(notification)
+    if ticket.engineer_eta_start or ticket.engineer_eta_end:
+        notification_rows += _customer_notification_rows(
+            ticket,
+            title="Engineer ETA updated",
+            message="Your engineer has shared an updated ETA.",
+            notification_type=NotificationType.ENGINEER_ETA
+        )
+    if notification_rows:
+        db.execute(insert(Notification), notification_rows)
     
     db.commit()
 
@@ -1319,7 +1361,7 @@ def request_completion_otp(
 @router.post("/{ticket_id}/eta")
 def update_ticket_eta(
     ticket_id: int,
-    eta_data: dict = Body(...),
+    eta_data: TicketEtaUpdate,
     current_user: User = Depends(require_role([UserRole.SUPPORT_ENGINEER])),
     db: Session = Depends(get_db)
 ):
@@ -1328,39 +1370,18 @@ def update_ticket_eta(
     if ticket.assigned_engineer_id != current_user.id:
         raise HTTPException(status_code=403, detail="Ticket not assigned to you")
 
-    eta_start = eta_data.get("eta_start")
-    eta_end = eta_data.get("eta_end")
-    if eta_start:
-        try:
-            ticket.engineer_eta_start = datetime.fromisoformat(eta_start.replace('Z', '+00:00'))
-        except Exception:
-            pass
-    if eta_end:
-        try:
-            ticket.engineer_eta_end = datetime.fromisoformat(eta_end.replace('Z', '+00:00'))
-        except Exception:
-            pass
-
-    if ticket.customer_id:
-        channels = [NotificationChannel.IN_APP]
-        if ticket.contact_preferences:
-            if "sms" in ticket.contact_preferences:
-                channels.append(NotificationChannel.SMS)
-            if "whatsapp" in ticket.contact_preferences:
-                channels.append(NotificationChannel.WHATSAPP)
-        for channel in channels:
-            notification = Notification(
-                organization_id=ticket.organization_id,
-                user_id=ticket.customer_id,
-                notification_type=NotificationType.ENGINEER_ETA,
-                channel=channel,
-                title="Engineer ETA updated",
-                message="Your engineer has shared an updated ETA.",
-                ticket_id=ticket.id,
-                status=NotificationStatus.PENDING,
-                action_url=f"/customer/ticket/{ticket.id}"
-            )
-            db.add(notification)
+    if eta_data.eta_start:
+        ticket.engineer_eta_start = eta_data.eta_start
+    if eta_data.eta_end:
+        ticket.engineer_eta_end = eta_data.eta_end
+
+    _queue_customer_notifications(
+        db,
+        ticket,
+        title="Engineer ETA updated",
+        message="Your engineer has shared an updated ETA.",
+        notification_type=NotificationType.ENGINEER_ETA
+    )
 
     db.commit()
     return {"message": "ETA updated"}
@@ -1369,22 +1390,22 @@ def update_ticket_eta(
 @router.post("/{ticket_id}/resolve")
 def resolve_ticket(
     ticket_id: int,
-    resolution_data: dict = Body(...),
+    resolution_data: TicketResolve,
     current_user: User = Depends(require_role([UserRole.SUPPORT_ENGINEER])),
     db: Session = Depends(get_db)
 ):
     """Resolve a ticket"""
     ticket = _ticket_or_404(db, ticket_id, current_user)
 
-    resolution_notes = resolution_data.get("resolution_notes") or ""
+    resolution_notes = resolution_data.resolution_notes or ""
     if not resolution_notes.strip():
         raise HTTPException(status_code=400, detail="resolution_notes is required")
 
-    parts_used = resolution_data.get("parts_used") or []
-    resolution_photos = resolution_data.get("resolution_photos") or []
-    customer_signature = resolution_data.get("customer_signature")
-    customer_otp_verified = bool(resolution_data.get("customer_otp_verified"))
-    otp = (resolution_data.get("otp") or "").strip()
+    parts_used = resolution_data.parts_used or []
+    resolution_photos = resolution_data.resolution_photos or []
+    customer_signature = resolution_data.customer_signature
+    customer_otp_verified = resolution_data.customer_otp_verified
+    otp = (resolution_data.otp or "").strip()
 
     if otp:
         now = datetime.now(timezone.utc)
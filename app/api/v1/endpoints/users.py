@@ -35,6 +35,8 @@ from app.models.warranty import WarrantyClaim
 from app.models.subscription import Vendor
 from app.models.ai_models import SentimentAnalysis, ChatSession
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.services.engineer_locations import engineer_location_cache
+from app.services.state_views import mark_state_views_stale
 
 router = APIRouter()
 
@@ -53,6 +55,11 @@ def _detach_user_references(db: Session, user_id: int, actor_id: int) -> None:
     db.query(Ticket).filter(Ticket.customer_id == user_id).update(
         {Ticket.customer_id: None}, synchronize_session=False
     )
+    # Unassigning changes engineer load in the state views; the bulk UPDATE skips the Ticket mapper events
+    for state_id, organization_id in (
+        db.query(Ticket.state_id, Ticket.organization_id).filter(Ticket.assigned_engineer_id == user_id).distinct()
+    ):
+        mark_state_views_stale(db, state_id, organization_id)
     db.query(Ticket).filter(Ticket.assigned_engineer_id == user_id).update(
         {Ticket.assigned_engineer_id: None}, synchronize_session=False
     )
@@ -377,6 +384,7 @@ def update_my_location(
     current_user.current_location_lat = lat
     current_user.current_location_lng = lng
     db.commit()
+    engineer_location_cache.pop(current_user.id)
     return {"message": "Location updated"}
 
 
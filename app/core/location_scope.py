@@ -169,10 +169,10 @@ def apply_ticket_query_scope(
     return query.filter(False)
 
 
-def get_ticket_if_accessible(db: Session, ticket_id: int, current_user: User) -> Optional[Ticket]:
-    """Single ticket if the current user may access it (same rules as list)."""
+def get_ticket_if_accessible(db: Session, ticket_id: int, current_user: User, *options) -> Optional[Ticket]:
+    """Single ticket if the current user may access it (same rules as list); options are passed to Query.options."""
     return apply_ticket_query_scope(
-        db.query(Ticket).filter(Ticket.id == ticket_id),
+        db.query(Ticket).options(*options).filter(Ticket.id == ticket_id),
         current_user,
         db,
         assigned_to_me=False,
@@ -1,6 +1,7 @@
 """
 Security utilities for authentication and authorization
 """
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -42,6 +43,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt releases the GIL while hashing, so a small pool lets callers overlap hashing with DB I/O.
+_password_hash_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="password-hash")
+
+
+def submit_password_hash(password: Optional[str] = None) -> "Future[str]":
+    """Start hashing in the background; call .result() when the hash is needed.
+    With no password, hashes the pending placeholder (see get_pending_password_hash)."""
+    if password is None:
+        return _password_hash_executor.submit(get_pending_password_hash)
+    return _password_hash_executor.submit(get_password_hash, password)
+
+
 # Placeholder hash for users who have not set password yet (signup → email link flow).
 # Login rejects users whose password_hash equals this.
 PENDING_PASSWORD_PLACEHOLDER = "PENDING_SET_PASSWORD"
@@ -0,0 +1,33 @@
+"""
+Portable SQL expressions for aggregates that differ per dialect.
+Production runs on MySQL, tests on SQLite; anything else gets the Postgres form.
+"""
+from sqlalchemy import Float
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class seconds_between(FunctionElement):
+    """Seconds from the first datetime expression to the second (end - start), as a float."""
+
+    type = Float()
+    name = "seconds_between"
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "EXTRACT(EPOCH FROM (%s - %s))" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, "mysql")
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "TIMESTAMPDIFF(SECOND, %s, %s)" % (compiler.process(start, **kw), compiler.process(end, **kw))
+
+
+@compiles(seconds_between, "sqlite")
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "((julianday(%s) - julianday(%s)) * 86400.0)" % (compiler.process(end, **kw), compiler.process(start, **kw))
@@ -109,16 +109,15 @@ assert len(INDIA_CITIES_BY_STATE.get("Uttar Pradesh", [])) >= 75, "Uttar Pradesh
 # For country_admin: list of {"name": state_name}
 INDIA_STATES_FULL = [{"name": s["name"]} for s in INDIA_STATES]
 
+# Upper-case state code -> state name (INDIA_STATES is static, so this is built once at import)
+_STATE_NAME_BY_CODE: Dict[str, str] = {s["code"].upper(): s["name"] for s in INDIA_STATES if s.get("code")}
+
 
 def state_code_to_name(code: str) -> str | None:
     """2-letter state code -> state name."""
     if not code or len(code) > 4:
         return None
-    c = code.strip().upper()
-    for s in INDIA_STATES:
-        if (s.get("code") or "").upper() == c:
-            return s.get("name")
-    return None
+    return _STATE_NAME_BY_CODE.get(code.strip().upper())
 
 
 def get_cities_for_state(state_name: str) -> List[dict]:
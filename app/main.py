@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 import asyncio
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from sqlalchemy import text
 
@@ -75,6 +76,9 @@ async def startup_event():
         if start_oem:
             asyncio.create_task(start_oem_sync_loop())
 
+# Compress JSON bodies (ticket lists/details, admin reads) for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
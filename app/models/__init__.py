@@ -18,6 +18,7 @@ from app.models.password_set_token import PasswordSetToken
 from app.models.ticket_otp import TicketOTP, TicketOTPPurpose
 from app.models.ticket_start_approval import TicketStartApproval
 from app.models.reminder_log import ReminderLog
+from app.models.ticket_number_counter import TicketNumberCounter
 
 __all__ = [
     "User",
@@ -76,6 +77,7 @@ __all__ = [
     "TicketOTPPurpose",
     "TicketStartApproval",
     "ReminderLog",
+    "TicketNumberCounter",
 ]
 
 
@@ -1,7 +1,7 @@
 """
 Inventory models
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Float, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Float, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -48,6 +48,7 @@ class Part(Base):
 class Inventory(Base):
     """Inventory stock levels"""
     __tablename__ = "inventory"
+    __table_args__ = (Index("ix_inventory_org_city_part", "organization_id", "city_id", "part_id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     part_id = Column(Integer, ForeignKey("parts.id"), nullable=False, index=True)
@@ -87,6 +88,10 @@ class Inventory(Base):
 class InventoryTransaction(Base):
     """Inventory transaction log"""
     __tablename__ = "inventory_transactions"
+    # Demand forecasts: outbound movements per inventory row within a date window
+    __table_args__ = (
+        Index("ix_inventory_tx_inventory_type_created", "inventory_id", "transaction_type", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     part_id = Column(Integer, ForeignKey("parts.id"), nullable=False, index=True)
@@ -1,7 +1,7 @@
 """
 Location models (Country, State, City)
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -27,6 +27,8 @@ class Country(Base):
 class State(Base):
     """State model"""
     __tablename__ = "states"
+    # Signup auto-creates states by name; concurrent signups fall back to the winner's row
+    __table_args__ = (Index("uq_states_country_name", "country_id", "name", unique=True),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
@@ -45,6 +47,7 @@ class State(Base):
 class City(Base):
     """City model"""
     __tablename__ = "cities"
+    __table_args__ = (Index("uq_cities_state_name", "state_id", "name", unique=True),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
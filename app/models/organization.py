@@ -1,7 +1,7 @@
 """
 Organization models
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -20,6 +20,7 @@ class OrganizationType(str, enum.Enum):
 class Organization(Base):
     """Organization model"""
     __tablename__ = "organizations"
+    __table_args__ = (Index("uq_organizations_email", "email", unique=True),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -1,7 +1,7 @@
 """
 Ticket models
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -32,6 +32,20 @@ class TicketPriority(str, enum.Enum):
 class Ticket(Base):
     """Ticket model"""
     __tablename__ = "tickets"
+    __table_args__ = (
+        # State/city admin scopes: tickets per city by status (and organization), active load per engineer
+        Index("ix_tickets_city_status_org", "city_id", "status", "organization_id"),
+        Index("ix_tickets_engineer_status", "assigned_engineer_id", "status"),
+        # Ticket listing (newest first) for customers and organization-scoped roles
+        Index("ix_tickets_customer_created", "customer_id", "created_at"),
+        Index("ix_tickets_org_created", "organization_id", "created_at"),
+        # Compliance alerts: per-city total and at-risk counts read from the index alone
+        Index("ix_tickets_city_sla_risk", "city_id", "sla_breach_risk"),
+        # State SLA risk listing (range on risk, ordered by it)
+        Index("ix_tickets_state_sla_risk", "state_id", "sla_breach_risk"),
+        # Training gaps: follow-ups per engineer
+        Index("ix_tickets_engineer_parent", "assigned_engineer_id", "parent_ticket_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     ticket_number = Column(String(50), unique=True, index=True, nullable=False)
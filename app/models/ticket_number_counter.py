@@ -0,0 +1,15 @@
+"""
+Per-day counter behind ER-YYYYMMDD-NNN ticket numbers (one row per UTC day).
+"""
+from sqlalchemy import Column, Integer, String
+
+from app.core.database import Base
+
+
+class TicketNumberCounter(Base):
+    __tablename__ = "ticket_number_counters"
+
+    # YYYYMMDD
+    day = Column(String(8), primary_key=True)
+    # Last sequence number handed out for the day
+    counter = Column(Integer, nullable=False)
@@ -1,6 +1,8 @@
 from app.schemas.user import UserBase, UserCreate, UserUpdate, UserResponse
 from app.schemas.auth import Token, TokenData, LoginRequest
-from app.schemas.ticket import TicketBase, TicketCreate, TicketUpdate, TicketResponse
+from app.schemas.ticket import (
+    TicketBase, TicketCreate, TicketUpdate, TicketEtaUpdate, TicketResolve, TicketResponse,
+)
 from app.schemas.organization import OrganizationBase, OrganizationCreate, OrganizationResponse
 from app.schemas.subscription import PlanBase, PlanResponse, SubscriptionBase, SubscriptionResponse
 from app.schemas.vendor import VendorBase, VendorCreate, VendorResponse
@@ -16,6 +18,8 @@ __all__ = [
     "TicketBase",
     "TicketCreate",
     "TicketUpdate",
+    "TicketEtaUpdate",
+    "TicketResolve",
     "TicketResponse",
     "OrganizationBase",
     "OrganizationCreate",
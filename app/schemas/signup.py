@@ -0,0 +1,88 @@
+"""
+Signup schemas
+"""
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional
+from app.models.organization import OrganizationType
+from app.models.subscription import BillingPeriod
+
+
+class SignupRequest(BaseModel):
+    """Public organization signup body. Location is ids OR codes/names (ids may be null from static lists)."""
+
+    org_name: str = Field(..., min_length=1)
+    org_type: OrganizationType
+    org_email: str = Field(..., min_length=1)
+    org_phone: str = Field(..., min_length=1)
+    org_address: Optional[str] = ""
+
+    admin_name: str = Field(..., min_length=1)
+    admin_email: str = Field(..., min_length=1)
+    admin_phone: str = Field(..., min_length=1)
+    admin_password: Optional[str] = None  # Omitted -> set-password link is emailed
+
+    plan_id: int
+    billing_period: BillingPeriod
+
+    country_id: Optional[int] = None
+    country_code: Optional[str] = None
+    state_id: Optional[int] = None
+    state_code: Optional[str] = None
+    state_name: Optional[str] = None
+    city_id: Optional[int] = None
+    city_name: Optional[str] = None
+
+    vendor_id: Optional[int] = None
+    vendor_code: Optional[str] = None
+
+    @field_validator("country_id", "state_id", "city_id", "vendor_id", mode="before")
+    @classmethod
+    def optional_id(cls, v):
+        """Unparseable or zero ids count as not provided (frontend sends null/""/0 for static lists)."""
+        if v is None:
+            return None
+        try:
+            return int(v) or None
+        except (TypeError, ValueError):
+            return None
+
+    @field_validator(
+        "org_name", "org_email", "org_phone", "org_address", "admin_name", "admin_email", "admin_phone",
+        "country_code", "state_code", "state_name", "city_name", "vendor_code",
+        mode="before",
+    )
+    @classmethod
+    def strip_text(cls, v):
+        """Strip once here so the handler and resolvers get normalized values (admin_password is left as typed)."""
+        return v.strip() if isinstance(v, str) else v
+
+    @field_validator("country_code", "state_code", "state_name", "city_name", "vendor_code")
+    @classmethod
+    def blank_as_none(cls, v):
+        return v or None
+
+    @field_validator("country_code", "state_code", "vendor_code")
+    @classmethod
+    def upper_code(cls, v):
+        return v.upper() if v else v
+
+    @field_validator("org_email", "admin_email")
+    @classmethod
+    def lower_email(cls, v):
+        return v.lower()
+
+    @field_validator("billing_period", mode="before")
+    @classmethod
+    def lower_billing_period(cls, v):
+        return v.lower() if isinstance(v, str) else v
+
+    @model_validator(mode="after")
+    def location_provided(self):
+        """Each location level needs an id or a code/name; messages are returned to the client as-is."""
+        if self.country_id is None and not self.country_code:
+            raise ValueError("Missing location: provide country_id or country_code (e.g. IN)")
+        if self.state_id is None and not self.state_code and not self.state_name:
+            raise ValueError("Missing location: provide state_id or state_code/state_name")
+        if self.city_id is None and not self.city_name:
+            raise ValueError("Missing location: provide city_id or city_name")
+        return self
@@ -1,7 +1,7 @@
 """
 Ticket schemas
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import datetime
 from app.models.ticket import TicketStatus, TicketPriority
@@ -30,6 +30,27 @@ class TicketUpdate(BaseModel):
     parts_used: Optional[List[dict]] = None
 
 
+class TicketEtaUpdate(BaseModel):
+    """Engineer ETA window (POST /tickets/{id}/start and /eta); ISO datetimes, blank means unset."""
+    eta_start: Optional[datetime] = None
+    eta_end: Optional[datetime] = None
+
+    @field_validator("eta_start", "eta_end", mode="before")
+    @classmethod
+    def _blank_as_none(cls, v):
+        return None if isinstance(v, str) and not v.strip() else v
+
+
+class TicketResolve(BaseModel):
+    """Engineer resolution (POST /tickets/{id}/resolve); resolution_notes is checked by the endpoint."""
+    resolution_notes: Optional[str] = None
+    parts_used: Optional[List[dict]] = None
+    resolution_photos: Optional[List[str]] = None
+    customer_signature: Optional[str] = None
+    customer_otp_verified: bool = False
+    otp: Optional[str] = None
+
+
 class TicketResponse(TicketBase):
     id: int
     ticket_number: str
@@ -0,0 +1,26 @@
+"""
+Engineer live locations for ticket tracking.
+Customers poll /tickets/{id}/tracking every few seconds while an engineer is on the way; a few seconds of
+staleness is fine there, so the coordinates are cached briefly and /users/me/location pops its entry.
+"""
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.models.user import User
+
+# (lat, lng) keyed by engineer user id
+engineer_location_cache = TTLCache(maxsize=4096, ttl=3)
+
+
+def engineer_location(db: Session, engineer_id: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """Current (lat, lng) of an engineer, or None if the user does not exist."""
+    location = engineer_location_cache.get(engineer_id)
+    if location is None:
+        row = db.query(User.current_location_lat, User.current_location_lng).filter(User.id == engineer_id).first()
+        if row is None:
+            return None
+        location = tuple(row)
+        engineer_location_cache.set(engineer_id, location)
+    return location
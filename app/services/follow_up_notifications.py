@@ -0,0 +1,27 @@
+"""
+Notification fan-out for follow-up tickets, run as a FastAPI background task after the ticket commits.
+"""
+import logging
+from typing import List
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def create_follow_up_notifications(rows: List[dict]) -> None:
+    """Insert Notification rows (column dicts) in one executemany on a session of its own."""
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(insert(Notification), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Follow-up notifications failed for ticket %s", rows[0].get("ticket_id"))
+    finally:
+        db.close()
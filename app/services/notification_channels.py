@@ -0,0 +1,21 @@
+"""
+Channels a ticket's customer is notified on: always in-app, plus SMS/WhatsApp when listed in the
+ticket's contact_preferences.
+"""
+from typing import Iterable, List, Optional
+
+from app.models.notification import NotificationChannel
+
+# contact_preferences entry -> channel, in the order notifications are queued
+_PREFERENCE_CHANNELS = {
+    "sms": NotificationChannel.SMS,
+    "whatsapp": NotificationChannel.WHATSAPP,
+}
+
+
+def customer_channels(contact_preferences: Optional[Iterable[str]]) -> List[NotificationChannel]:
+    """In-app first, then each opted-in SMS/WhatsApp channel."""
+    preferences = contact_preferences or ()
+    return [NotificationChannel.IN_APP] + [
+        channel for preference, channel in _PREFERENCE_CHANNELS.items() if preference in preferences
+    ]
@@ -0,0 +1,121 @@
+"""
+Short-lived caches for state admin aggregate reads.
+/dashboard and /cities are hit on every page load; committed ticket writes pop the affected entries.
+Filtered reads (/sla-risk, /compliance-alerts) have too many keys to pop, so they are stamped with the
+state's ticket version when computed and ignored once a ticket write in that state bumps it.
+Ticket writes are tracked centrally: Ticket mapper events note the touched (state, organization) pairs on
+the session and invalidation runs once the session commits. Core/bulk INSERT/UPDATE statements on tickets
+skip the mapper, so their callers note the pairs with mark_state_views_stale.
+City ids per state back most of these scopes; City inserts/updates/deletes drop them via mapper events,
+and Core City inserts call invalidate_state_city_ids.
+"""
+import threading
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.models.location import City
+from app.models.ticket import Ticket
+
+STATE_VIEWS = ("dashboard", "cities")
+
+# Payloads keyed by (view, state_id, organization_id); organization_id is None for unscoped state admins.
+# Popped after any committed ticket write in the state (see _note_ticket_write); the TTL only bounds
+# writes that bypass the ORM without mark_state_views_stale.
+state_view_cache = TTLCache(maxsize=1024, ttl=60)
+
+# (ticket_version, payload) keyed by (view, state_id, *filters)
+state_query_cache = TTLCache(maxsize=2048, ttl=300)
+_ticket_versions: dict = {}
+_ticket_versions_lock = threading.Lock()
+
+# session.info key: (state_id, organization_id) pairs with ticket writes in the open transaction
+_STALE_STATES = "state_views_stale"
+
+# Tuple of city ids keyed by state_id
+state_city_ids_cache = TTLCache(maxsize=1024, ttl=600)
+
+
+def invalidate_state_views(state_id: Optional[int], organization_id: Optional[int]) -> None:
+    """Drop cached views a ticket change in this state/org can affect (the org's and the unscoped ones)."""
+    if not state_id:
+        return
+    for view in STATE_VIEWS:
+        state_view_cache.pop((view, state_id, organization_id))
+        state_view_cache.pop((view, state_id, None))
+    with _ticket_versions_lock:
+        _ticket_versions[state_id] = _ticket_versions.get(state_id, 0) + 1
+
+
+def mark_state_views_stale(session: Session, state_id: Optional[int], organization_id: Optional[int]) -> None:
+    """Invalidate a state's views once the session commits (ticket writes that bypass the mapper)."""
+    if state_id:
+        session.info.setdefault(_STALE_STATES, set()).add((state_id, organization_id))
+
+
+def cached_state_query(key: Hashable, state_id: int, build: Callable[[], Any]) -> Any:
+    """Return the cached payload for key unless a ticket write in the state happened since; else build it."""
+    version = _ticket_versions.get(state_id, 0)
+    cached = state_query_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    # Stamped with the version read before building, so a write racing the build invalidates it
+    value = build()
+    state_query_cache.set(key, (version, value))
+    return value
+
+
+def state_city_ids(db: Session, state_id: int) -> Tuple[int, ...]:
+    """Ids of the cities in a state (cached; cities change rarely)."""
+    ids = state_city_ids_cache.get(state_id)
+    if ids is None:
+        ids = tuple(city_id for (city_id,) in db.query(City.id).filter(City.state_id == state_id).order_by(City.id))
+        state_city_ids_cache.set(state_id, ids)
+    return ids
+
+
+def invalidate_state_city_ids(state_id: Optional[int]) -> None:
+    """Drop a state's cached city ids (City writes that bypass the mapper must call this)."""
+    state_city_ids_cache.pop(state_id)
+
+
+@event.listens_for(City, "after_insert")
+@event.listens_for(City, "after_delete")
+def _drop_state_city_ids(_mapper, _connection, city) -> None:
+    invalidate_state_city_ids(city.state_id)
+
+
+@event.listens_for(City, "after_update")
+def _drop_all_state_city_ids(_mapper, _connection, _city) -> None:
+    # The city may have moved between states; the old state_id is not at hand here
+    state_city_ids_cache.clear()
+
+
+@event.listens_for(Ticket, "after_insert")
+@event.listens_for(Ticket, "after_update")
+@event.listens_for(Ticket, "after_delete")
+def _note_ticket_write(_mapper, _connection, ticket) -> None:
+    session = object_session(ticket)
+    if session is None:
+        return
+    attrs = inspect(ticket).attrs
+    # A ticket moved between states/organizations leaves the old scope stale too
+    for state_id in {ticket.state_id, *attrs.state_id.history.deleted}:
+        for organization_id in {ticket.organization_id, *attrs.organization_id.history.deleted}:
+            mark_state_views_stale(session, state_id, organization_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_ticket_writes(session: Session) -> None:
+    for state_id, organization_id in session.info.pop(_STALE_STATES, ()):
+        invalidate_state_views(state_id, organization_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back_ticket_writes(session: Session, transaction) -> None:
+    # Commit already consumed the marks; anything left on the outermost transaction was rolled back.
+    # Savepoint rollbacks keep them (over-invalidating is harmless, missing a write is not).
+    if transaction.parent is None:
+        session.info.pop(_STALE_STATES, None)
@@ -5,12 +5,32 @@ from calendar import monthrange
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 if TYPE_CHECKING:
     from app.models.subscription import Subscription
 
 
+# Active plan pricing rows by plan id, for signup. Plan admin endpoints pop entries they change.
+active_plan_cache = TTLCache(maxsize=128, ttl=300)
+
+
+def get_active_plan(db, plan_id: int):
+    """(id, name, monthly_price, annual_price) row for an active plan, or None. Cached for 5 minutes."""
+    plan = active_plan_cache.get(plan_id)
+    if plan is None:
+        from app.models.subscription import Plan
+
+        plan = db.query(Plan.id, Plan.name, Plan.monthly_price, Plan.annual_price).filter(
+            Plan.id == plan_id,
+            Plan.is_active == True
+        ).first()
+        if plan is not None:
+            active_plan_cache.set(plan_id, plan)
+    return plan
+
+
 def add_months(dt: datetime, months: int) -> datetime:
     """Add calendar months in UTC."""
     if dt.tzinfo is None:
@@ -63,27 +83,32 @@ def advance_billing_date(current: datetime, months: int | None = None) -> dateti
     return add_months(current, interval)
 
 
-def apply_complimentary_subscription_fields(subscription: "Subscription", start: datetime | None = None) -> None:
+def complimentary_subscription_fields(start: datetime, current_status: str | None = None) -> dict:
     """
-    New or upgraded subscriptions: active access now; first billing notice after N months.
+    Field values for a new or upgraded subscription: active access now; first billing notice after N months.
     Razorpay/autopay only when PAYMENTS_ENABLED and keys are configured.
     """
     from app.services import razorpay_service
 
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    fields = {
+        "billing_interval_months": complimentary_access_months(),
+        "next_billing_date": first_billing_date_after_setup(start),
+        "autopay_setup_complete": False,
+    }
+    if payments_enabled() and razorpay_service.is_razorpay_configured():
+        fields["status"] = "pending_autopay"
+    elif current_status in (None, "", "pending_autopay"):
+        fields["status"] = "active"
+    return fields
+
+
+def apply_complimentary_subscription_fields(subscription: "Subscription", start: datetime | None = None) -> None:
+    """Apply complimentary_subscription_fields() to an ORM subscription."""
     base = start or subscription.start_date or datetime.now(timezone.utc)
-    if base.tzinfo is None:
-        base = base.replace(tzinfo=timezone.utc)
-    months = complimentary_access_months()
-    subscription.billing_interval_months = months
-    subscription.next_billing_date = first_billing_date_after_setup(base)
-    use_payments = payments_enabled() and razorpay_service.is_razorpay_configured()
-    if use_payments:
-        subscription.status = "pending_autopay"
-        subscription.autopay_setup_complete = False
-    else:
-        if subscription.status in (None, "", "pending_autopay"):
-            subscription.status = "active"
-        subscription.autopay_setup_complete = False
+    for key, value in complimentary_subscription_fields(base, subscription.status).items():
+        setattr(subscription, key, value)
 
 
 def ensure_complimentary_period(db, subscription: "Subscription") -> bool:
@@ -6,18 +6,18 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import func
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
 
 from app.models.ticket import Ticket
+from app.models.ticket_number_counter import TicketNumberCounter
 
 
-def allocate_er_ticket_number(db: "Session") -> str:
-    """Next ER-YYYYMMDD-### for the current UTC day. Caller must commit with the new ticket row."""
-    day = datetime.utcnow().strftime("%Y%m%d")
-    prefix = f"ER-{day}-"
+def _first_free_seq(db: "Session", prefix: str) -> int:
+    """Next unused sequence for a day from the tickets themselves (only used to seed a day's counter)."""
     max_num = (
         db.query(func.max(Ticket.ticket_number))
         .filter(Ticket.ticket_number.like(f"{prefix}%"))
@@ -29,8 +29,33 @@ def allocate_er_ticket_number(db: "Session") -> str:
             next_seq = int(max_num.rsplit("-", 1)[-1]) + 1
         except ValueError:
             next_seq = 1
-    candidate = f"{prefix}{next_seq:03d}"
-    while db.query(Ticket.id).filter(Ticket.ticket_number == candidate).first():
+    while db.query(Ticket.id).filter(Ticket.ticket_number == f"{prefix}{next_seq:03d}").first():
         next_seq += 1
-        candidate = f"{prefix}{next_seq:03d}"
-    return candidate
+    return next_seq
+
+
+def allocate_er_ticket_number(db: "Session") -> str:
+    """Next ER-YYYYMMDD-### for the current UTC day. Caller must commit with the new ticket row.
+
+    Bumps the day's counter row in place; the row lock taken by the UPDATE serialises concurrent
+    allocations until the caller's commit. The first allocation of a day seeds the counter.
+    """
+    day = datetime.utcnow().strftime("%Y%m%d")
+    prefix = f"ER-{day}-"
+    bump = (
+        update(TicketNumberCounter)
+        .where(TicketNumberCounter.day == day)
+        .values(counter=TicketNumberCounter.counter + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if not db.execute(bump).rowcount:
+        next_seq = _first_free_seq(db, prefix)
+        # day is the primary key: if a concurrent request seeded it first, bump its row instead
+        try:
+            with db.begin_nested():
+                db.add(TicketNumberCounter(day=day, counter=next_seq))
+            return f"{prefix}{next_seq:03d}"
+        except IntegrityError:
+            db.execute(bump)
+    next_seq = db.query(TicketNumberCounter.counter).filter(TicketNumberCounter.day == day).scalar()
+    return f"{prefix}{next_seq:03d}"
@@ -0,0 +1,69 @@
+"""
+In-process TTL cache used for slow-changing lookups.
+"""
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_get_set_pop():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.pop("a") == 1
+    assert cache.get("a", "missing") == "missing"
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    import app.core.cache as cache_module
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_evicts_oldest_when_full():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_cached_state_query_rebuilds_after_state_ticket_write():
+    from app.services.state_views import cached_state_query, invalidate_state_views, state_query_cache
+    state_query_cache.clear()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return len(builds)
+
+    assert cached_state_query(("sla-risk", 901), 901, build) == 1
+    assert cached_state_query(("sla-risk", 901), 901, build) == 1
+    invalidate_state_views(902, None)
+    assert cached_state_query(("sla-risk", 901), 901, build) == 1
+    invalidate_state_views(901, None)
+    assert cached_state_query(("sla-risk", 901), 901, build) == 2
+    state_query_cache.clear()
+
+
+def test_state_view_marks_apply_on_commit_and_drop_on_rollback(test_db):
+    from sqlalchemy import text
+    from app.services.state_views import _ticket_versions, mark_state_views_stale
+    before = _ticket_versions.get(903, 0)
+    mark_state_views_stale(test_db, 903, None)
+    savepoint = test_db.begin_nested()
+    savepoint.rollback()
+    test_db.commit()
+    assert _ticket_versions.get(903, 0) == before + 1
+    test_db.execute(text("SELECT 1"))
+    mark_state_views_stale(test_db, 903, None)
+    test_db.rollback()
+    test_db.commit()
+    assert _ticket_versions.get(903, 0) == before + 1
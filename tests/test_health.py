@@ -22,3 +22,12 @@ def test_docs_available(client):
     """Test that API docs are available (main app mounts at /api/docs)"""
     response = client.get("/api/docs")
     assert response.status_code == 200
+
+@pytest.mark.api
+def test_large_json_responses_are_gzipped(client):
+    """Bodies over the GZip threshold are compressed for clients that accept it; small ones are not"""
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "paths" in response.json()
+    assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
@@ -10,12 +10,29 @@ from app.models.user import User, UserRole
 from app.models.organization import Organization, OrganizationType
 from app.models.location import Country, State, City
 from app.models.subscription import Plan, BillingPeriod, Subscription
-from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket import Ticket, TicketStatus, TicketPriority, TicketComment
+from app.models.inventory import Inventory, InventoryTransaction, Part
 
 
 TEST_PASSWORD = "HierarchyTest1!"
 
 
+@pytest.fixture(autouse=True)
+def clear_state_view_cache():
+    """Rows (and their ids) roll back between tests, so cached state dashboards must not leak."""
+    from app.api.v1.endpoints.state_admin import _india_state_name_cache
+    from app.services.engineer_locations import engineer_location_cache
+    from app.services.state_views import state_city_ids_cache, state_query_cache, state_view_cache
+    caches = (
+        state_view_cache, state_query_cache, state_city_ids_cache, _india_state_name_cache, engineer_location_cache,
+    )
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+
+
 @pytest.fixture
 def plan_in_db(test_db):
     """Ensure one active plan for subscription."""
@@ -591,3 +608,782 @@ def test_customer_sees_only_own_tickets(client, hierarchy_data_with_tickets):
     tickets2 = r2.json()
     assert len(tickets2) == 1
     assert "HIER-TN" in tickets2[0]["ticket_number"]
+
+
+@pytest.mark.api
+def test_state_admin_dashboard_aggregates_tickets(client, test_db, hierarchy_data_with_tickets):
+    """Dashboard counts, SLA compliance and MTTR come from the state's tickets only."""
+    data = hierarchy_data_with_tickets
+    bengaluru = next(c for c in data["cities"] if c.name == "Bengaluru")
+    created = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+    test_db.add(Ticket(
+        ticket_number=f"TKT-HIER-KA-RESOLVED-{bengaluru.id}",
+        organization_id=data["org"].id,
+        country_id=data["country"].id,
+        state_id=bengaluru.state_id,
+        city_id=bengaluru.id,
+        service_address="Address in Bengaluru",
+        issue_description="Resolved issue in Bengaluru",
+        status=TicketStatus.RESOLVED,
+        priority=TicketPriority.MEDIUM,
+        created_at=created,
+        resolved_at=created + timedelta(hours=2),
+    ))
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/dashboard", headers=_headers(token))
+    assert r.status_code == 200
+    body = r.json()
+    assert body["totalTickets"] == 2
+    assert body["slaCompliance"] == 50.0
+    assert body["mttr"] == pytest.approx(2.0, abs=0.01)
+    assert body["repeatVisits"] == 0
+
+
+@pytest.mark.api
+def test_state_admin_cities_metrics_per_city(client, hierarchy_data_with_tickets):
+    """Each DB city row carries its own ticket metrics; cities without tickets get zeros."""
+    data = hierarchy_data_with_tickets
+    bengaluru = next(c for c in data["cities"] if c.name == "Bengaluru")
+    mysuru = next(c for c in data["cities"] if c.name == "Mysuru")
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/cities", headers=_headers(token))
+    assert r.status_code == 200
+    rows = {c["id"]: c for c in r.json() if c.get("id")}
+    assert rows[bengaluru.id]["ticketCount"] == 1
+    assert rows[bengaluru.id]["slaCompliance"] == 0
+    assert rows[mysuru.id]["ticketCount"] == 0
+    assert rows[mysuru.id]["mttr"] == 0.0
+
+
+@pytest.mark.api
+def test_state_admin_reallocation_list_counts_active_tickets(client, test_db, hierarchy_data_with_tickets):
+    """Reallocation list shows each engineer's city name and assigned/in-progress ticket count."""
+    data = hierarchy_data_with_tickets
+    bengaluru = next(c for c in data["cities"] if c.name == "Bengaluru")
+    engineer = data["users"][f"engineer_{bengaluru.id}"]
+    ticket = data["tickets"]["bengaluru"]
+    ticket.assigned_engineer_id = engineer.id
+    ticket.status = TicketStatus.ASSIGNED
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/engineers/reallocations", headers=_headers(token))
+    assert r.status_code == 200
+    rows = {e["id"]: e for e in r.json()}
+    assert rows[engineer.id]["city_name"] == "Bengaluru"
+    assert rows[engineer.id]["assigned_tickets"] == 1
+    assert all(e["assigned_tickets"] == 0 for eid, e in rows.items() if eid != engineer.id)
+
+
+@pytest.mark.api
+def test_state_admin_city_inventory_includes_part_details(client, test_db, hierarchy_data):
+    """City inventory rows carry part name/sku and are scoped to the requested city."""
+    bengaluru = next(c for c in hierarchy_data["cities"] if c.name == "Bengaluru")
+    part = Part(sku="HIER-PART-1", name="Hierarchy Part")
+    test_db.add(part)
+    test_db.flush()
+    test_db.add(Inventory(
+        part_id=part.id,
+        organization_id=hierarchy_data["org"].id,
+        state_id=bengaluru.state_id,
+        city_id=bengaluru.id,
+        current_stock=3,
+        min_threshold=5,
+        is_low_stock=True,
+    ))
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["state_admin_KA"].email)
+    r = client.get(f"/api/v1/state-admin/cities/{bengaluru.id}/inventory", headers=_headers(token))
+    assert r.status_code == 200
+    assert [(i["part_name"], i["sku"], i["current_stock"]) for i in r.json()] == [("Hierarchy Part", "HIER-PART-1", 3)]
+    r2 = client.get("/api/v1/state-admin/inventory/parts", headers=_headers(token))
+    assert r2.status_code == 200
+    assert r2.json()[0]["part_name"] == "Hierarchy Part"
+    mysuru = next(c for c in hierarchy_data["cities"] if c.name == "Mysuru")
+    r3 = client.get(f"/api/v1/state-admin/cities/{mysuru.id}/inventory", headers=_headers(token))
+    assert r3.status_code == 200
+    assert r3.json() == []
+
+
+@pytest.mark.api
+def test_state_admin_inventory_parts_spans_stream_chunks(client, test_db, hierarchy_data):
+    """/inventory/parts returns every row when the state holds more than one streamed chunk of inventory."""
+    from sqlalchemy import insert
+    cities = [c for c in hierarchy_data["cities"] if c.name in ("Bengaluru", "Mysuru")]
+    parts = [Part(sku=f"CHUNK-PART-{i}", name=f"Chunk Part {i}") for i in range(2)]
+    test_db.add_all(parts)
+    test_db.flush()
+    rows = [
+        dict(
+            part_id=parts[i % 2].id,
+            organization_id=hierarchy_data["org"].id,
+            state_id=cities[0].state_id,
+            city_id=cities[i % len(cities)].id,
+            current_stock=i,
+            min_threshold=0,
+        )
+        for i in range(1001)
+    ]
+    test_db.execute(insert(Inventory), rows)
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/inventory/parts", headers=_headers(token))
+    assert r.status_code == 200
+    by_sku = {p["sku"]: p for p in r.json()}
+    assert sum(len(by_sku[p.sku]["cities"]) for p in parts) == 1001
+    assert by_sku["CHUNK-PART-0"]["part_name"] == "Chunk Part 0"
+
+
+@pytest.mark.api
+def test_state_admin_dashboard_refreshed_on_ticket_commit(client, test_db, hierarchy_data_with_tickets):
+    """Dashboard is served from cache; committed ORM ticket writes (or marked Core ones) make the next call re-read."""
+    from sqlalchemy import insert
+    from app.services.state_views import mark_state_views_stale
+    data = hierarchy_data_with_tickets
+    admin = data["users"]["state_admin_KA"]
+    token = _login(client, admin.email)
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 1
+    ticket = data["tickets"]["bengaluru"]
+    columns = dict(
+        organization_id=ticket.organization_id,
+        country_id=ticket.country_id,
+        state_id=ticket.state_id,
+        city_id=ticket.city_id,
+        service_address="Address in Bengaluru",
+        issue_description="Another issue in Bengaluru",
+        status=TicketStatus.CREATED,
+        priority=TicketPriority.MEDIUM,
+    )
+    test_db.add(Ticket(ticket_number=f"TKT-HIER-KA-2-{ticket.city_id}", **columns))
+    test_db.commit()
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 2
+
+    # Core inserts skip the mapper events: cached until the writer marks the state
+    test_db.execute(insert(Ticket).values(ticket_number=f"TKT-HIER-KA-3-{ticket.city_id}", **columns))
+    test_db.commit()
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 2
+    mark_state_views_stale(test_db, ticket.state_id, ticket.organization_id)
+    test_db.commit()
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 3
+
+
+@pytest.mark.api
+def test_state_admin_dashboard_refreshed_after_city_admin_follow_up(client, test_db, hierarchy_data_with_tickets):
+    """A follow-up ticket raised through the city admin API shows up on the cached state dashboard at once."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 1
+
+    city_token = _login(client, data["users"][f"city_admin_{ticket.city_id}"].email)
+    r = client.post(
+        f"/api/v1/city-admin/complaints/{ticket.id}/follow-up",
+        json={"action_type": "revisit", "create_follow_up_ticket": True},
+        headers=_headers(city_token),
+    )
+    assert r.status_code == 200, r.json()
+    assert client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()["totalTickets"] == 2
+
+@pytest.mark.api
+def test_state_admin_city_tickets_and_complaints(client, test_db, hierarchy_data_with_tickets):
+    """City ticket and complaint listings serialize the selected columns."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    ticket.customer_rating = 1
+    ticket.customer_feedback = "Late"
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get(f"/api/v1/state-admin/cities/{ticket.city_id}/tickets", headers=_headers(token))
+    assert r.status_code == 200
+    assert [(t["id"], t["status"], t["priority"]) for t in r.json()] == [(ticket.id, "created", "medium")]
+    r2 = client.get(f"/api/v1/state-admin/cities/{ticket.city_id}/complaints", headers=_headers(token))
+    assert r2.status_code == 200
+    assert [(c["id"], c["customer_rating"], c["customer_feedback"]) for c in r2.json()] == [(ticket.id, 1, "Late")]
+
+
+@pytest.mark.api
+def test_state_admin_city_tickets_paged(client, test_db, hierarchy_data_with_tickets):
+    """City ticket listing honours skip/limit and rejects limits above the cap."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    test_db.add(Ticket(
+        ticket_number=f"TKT-HIER-KA-PAGE-{ticket.city_id}",
+        organization_id=ticket.organization_id,
+        state_id=ticket.state_id,
+        city_id=ticket.city_id,
+        service_address="Address in Bengaluru",
+        issue_description="Another issue in Bengaluru",
+        status=TicketStatus.CREATED,
+        priority=TicketPriority.LOW,
+    ))
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    url = f"/api/v1/state-admin/cities/{ticket.city_id}/tickets"
+    first = client.get(url, params={"limit": 1}, headers=_headers(token)).json()
+    second = client.get(url, params={"skip": 1, "limit": 1}, headers=_headers(token)).json()
+    assert len(first) == 1 and len(second) == 1
+    assert first[0]["id"] != second[0]["id"]
+    assert client.get(url, params={"limit": 1000}, headers=_headers(token)).status_code == 422
+
+
+@pytest.mark.api
+def test_state_admin_transfer_inventory_logs_both_sides(client, test_db, hierarchy_data):
+    """Transfer moves stock between cities and writes an out and an in transaction."""
+    bengaluru = next(c for c in hierarchy_data["cities"] if c.name == "Bengaluru")
+    mysuru = next(c for c in hierarchy_data["cities"] if c.name == "Mysuru")
+    part = Part(sku="HIER-PART-XFER", name="Transfer Part")
+    test_db.add(part)
+    test_db.flush()
+    source = Inventory(
+        part_id=part.id,
+        organization_id=hierarchy_data["org"].id,
+        state_id=bengaluru.state_id,
+        city_id=bengaluru.id,
+        current_stock=10,
+        min_threshold=2,
+    )
+    test_db.add(source)
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["state_admin_KA"].email)
+    r = client.post(
+        "/api/v1/state-admin/inventory/transfer",
+        json={"from_city_id": bengaluru.id, "to_city_id": mysuru.id, "part_id": part.id, "quantity": 4},
+        headers=_headers(token),
+    )
+    assert r.status_code == 200, r.json()
+    assert (r.json()["from_stock_after"], r.json()["to_stock_after"]) == (6, 4)
+    txs = test_db.query(InventoryTransaction).filter(InventoryTransaction.part_id == part.id).all()
+    assert sorted((t.transaction_type, t.previous_stock, t.new_stock) for t in txs) == [("in", 0, 4), ("out", 10, 6)]
+
+
+@pytest.mark.api
+def test_state_admin_transfer_inventory_updates_low_stock_flags(client, test_db, hierarchy_data):
+    """The transfer UPDATE recomputes is_low_stock on both rows from their new levels."""
+    bengaluru = next(c for c in hierarchy_data["cities"] if c.name == "Bengaluru")
+    mysuru = next(c for c in hierarchy_data["cities"] if c.name == "Mysuru")
+    part = Part(sku="HIER-PART-LOW", name="Low Stock Part")
+    test_db.add(part)
+    test_db.flush()
+    org_id = hierarchy_data["org"].id
+    source = Inventory(part_id=part.id, organization_id=org_id, state_id=bengaluru.state_id,
+                       city_id=bengaluru.id, current_stock=10, min_threshold=3, is_low_stock=False)
+    dest = Inventory(part_id=part.id, organization_id=org_id, state_id=mysuru.state_id,
+                     city_id=mysuru.id, current_stock=1, min_threshold=3, is_low_stock=True)
+    test_db.add_all([source, dest])
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["state_admin_KA"].email)
+    r = client.post(
+        "/api/v1/state-admin/inventory/transfer",
+        json={"from_city_id": bengaluru.id, "to_city_id": mysuru.id, "part_id": part.id, "quantity": 7},
+        headers=_headers(token),
+    )
+    assert r.status_code == 200, r.json()
+    test_db.expire_all()
+    assert (source.current_stock, source.is_low_stock) == (3, True)
+    assert (dest.current_stock, dest.is_low_stock) == (8, False)
+
+
+@pytest.mark.api
+def test_state_admin_city_overview_counts(client, hierarchy_data_with_tickets):
+    """City overview counts open/resolved tickets for the city."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get(f"/api/v1/state-admin/cities/{ticket.city_id}/overview", headers=_headers(token))
+    assert r.status_code == 200
+    assert r.json()["stats"] == {"total_tickets": 1, "open_tickets": 1, "resolved_tickets": 0, "sla_compliance": 0}
+
+
+def test_pick_available_engineer_state_prefers_least_loaded(test_db, hierarchy_data_with_tickets):
+    """The picker returns the available engineer with the fewest assigned/in-progress tickets."""
+    from app.api.v1.endpoints.state_admin import pick_available_engineer_state
+    data = hierarchy_data_with_tickets
+    bengaluru = next(c for c in data["cities"] if c.name == "Bengaluru")
+    mysuru = next(c for c in data["cities"] if c.name == "Mysuru")
+    busy = data["users"][f"engineer_{bengaluru.id}"]
+    idle = data["users"][f"engineer_{mysuru.id}"]
+    ticket = data["tickets"]["bengaluru"]
+    ticket.assigned_engineer_id = busy.id
+    ticket.status = TicketStatus.IN_PROGRESS
+    test_db.flush()
+    assert pick_available_engineer_state(test_db, bengaluru.state_id, None, data["org"].id).id == idle.id
+    assert pick_available_engineer_state(test_db, bengaluru.state_id, bengaluru.id, data["org"].id).id == busy.id
+
+
+@pytest.mark.api
+def test_state_admin_resource_balancing_counts_active_tickets(client, test_db, hierarchy_data_with_tickets):
+    """Active tickets per city count assigned/in-progress tickets (enum statuses, not raw strings)."""
+    data = hierarchy_data_with_tickets
+    bengaluru = next(c for c in data["cities"] if c.name == "Bengaluru")
+    ticket = data["tickets"]["bengaluru"]
+    ticket.assigned_engineer_id = data["users"][f"engineer_{bengaluru.id}"].id
+    ticket.status = TicketStatus.ASSIGNED
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/resource-balancing", headers=_headers(token))
+    assert r.status_code == 200
+    rows = {row["cityId"]: row for row in r.json()}
+    assert rows[bengaluru.id]["activeTickets"] == 1
+    assert rows[bengaluru.id]["engineers"] == 1
+    assert rows[bengaluru.id]["workload"] == 1
+
+
+@pytest.mark.api
+def test_state_admin_cities_repeat_visits(client, test_db, hierarchy_data_with_tickets):
+    """A device with two tickets in a city counts as one repeat visit for that city and the dashboard."""
+    from app.models.device import Device
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    device = Device(
+        serial_number="HIER-DEV-1",
+        model_number="M-1",
+        product_category="AC",
+        brand="Acme",
+        organization_id=ticket.organization_id,
+        customer_id=data["users"]["customer1"].id,
+    )
+    test_db.add(device)
+    test_db.flush()
+    ticket.device_id = device.id
+    test_db.add(Ticket(
+        ticket_number=f"TKT-HIER-KA-REPEAT-{ticket.city_id}",
+        organization_id=ticket.organization_id,
+        state_id=ticket.state_id,
+        city_id=ticket.city_id,
+        device_id=device.id,
+        service_address="Address in Bengaluru",
+        issue_description="Repeat issue in Bengaluru",
+        status=TicketStatus.CREATED,
+        priority=TicketPriority.MEDIUM,
+    ))
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    rows = {c["id"]: c for c in client.get("/api/v1/state-admin/cities", headers=_headers(token)).json() if c.get("id")}
+    assert rows[ticket.city_id]["repeatVisits"] == 1
+    dashboard = client.get("/api/v1/state-admin/dashboard", headers=_headers(token)).json()
+    assert dashboard["repeatVisits"] == 1
+
+
+@pytest.mark.api
+def test_state_admin_training_gaps_groups_followups_by_skill(client, test_db, hierarchy_data_with_tickets):
+    """Follow-up tickets are counted per engineer skill level, with distinct engineers per level."""
+    data = hierarchy_data_with_tickets
+    parent = data["tickets"]["bengaluru"]
+    engineer = data["users"][f"engineer_{parent.city_id}"]
+    engineer.engineer_skill_level = "junior"
+    for n in range(2):
+        test_db.add(Ticket(
+            ticket_number=f"TKT-HIER-KA-FU{n}-{parent.city_id}",
+            organization_id=parent.organization_id,
+            state_id=parent.state_id,
+            city_id=parent.city_id,
+            parent_ticket_id=parent.id,
+            assigned_engineer_id=engineer.id,
+            service_address="Address in Bengaluru",
+            issue_description="Follow-up in Bengaluru",
+            status=TicketStatus.ASSIGNED,
+            priority=TicketPriority.MEDIUM,
+        ))
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/training-gaps", headers=_headers(token))
+    assert r.status_code == 200
+    assert r.json() == [{"skill_level": "junior", "repeat_visits": 2, "engineers": 1}]
+
+
+@pytest.mark.api
+def test_state_admin_compliance_alerts_need_five_tickets(client, test_db, hierarchy_data_with_tickets):
+    """A city alerts once it has >= 5 tickets and >= 20% of them at SLA risk (recomputed after each ticket commit)."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    ticket.sla_breach_risk = 0.9
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    for n in range(4):
+        test_db.add(Ticket(
+            ticket_number=f"TKT-HIER-KA-RISK{n}-{ticket.city_id}",
+            organization_id=ticket.organization_id,
+            state_id=ticket.state_id,
+            city_id=ticket.city_id,
+            service_address="Address in Bengaluru",
+            issue_description="Risk issue in Bengaluru",
+            status=TicketStatus.CREATED,
+            priority=TicketPriority.MEDIUM,
+        ))
+        test_db.commit()
+        alerts = client.get("/api/v1/state-admin/compliance-alerts", headers=_headers(token)).json()
+        assert alerts == ([] if n < 3 else [{
+            "city_id": ticket.city_id, "city_name": "Bengaluru", "at_risk": 1, "total": 5, "ratio": 20.0,
+        }])
+
+
+@pytest.mark.api
+def test_state_admin_follow_up_notifies_customer_channels_and_engineer(
+    client, test_db, hierarchy_data_with_tickets, monkeypatch
+):
+    """A follow-up ticket notifies the customer on each preferred channel plus the assigned engineer (after the response)."""
+    from app.models.notification import Notification, NotificationChannel
+    from app.services import follow_up_notifications
+    from sqlalchemy.orm import Session
+    # The task opens its own session: give it one on the test connection so its rows are visible here
+    monkeypatch.setattr(follow_up_notifications, "SessionLocal", lambda: Session(bind=test_db.get_bind()))
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    ticket.customer_id = data["users"]["customer1"].id
+    ticket.contact_preferences = ["sms"]
+    engineer = data["users"][f"engineer_{ticket.city_id}"]
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.post(
+        f"/api/v1/state-admin/complaints/{ticket.id}/follow-up",
+        json={"create_follow_up_ticket": True, "engineer_id": engineer.id, "notes": "revisit"},
+        headers=_headers(token),
+    )
+    assert r.status_code == 200, r.json()
+    follow_up_id = r.json()["follow_up_ticket_id"]
+    follow_up = test_db.query(Ticket).filter(Ticket.id == follow_up_id).one()
+    assert (follow_up.parent_ticket_id, follow_up.assigned_engineer_id, follow_up.status) == (
+        ticket.id, engineer.id, TicketStatus.ASSIGNED
+    )
+    notes = test_db.query(Notification).filter(Notification.ticket_id == follow_up_id).all()
+    assert sorted((n.user_id, n.channel) for n in notes) == sorted([
+        (ticket.customer_id, NotificationChannel.IN_APP),
+        (ticket.customer_id, NotificationChannel.SMS),
+        (engineer.id, NotificationChannel.IN_APP),
+    ])
+
+
+def test_allocate_er_ticket_number_seeds_then_bumps_day_counter(test_db, hierarchy_data_with_tickets):
+    """The first number of a day continues after existing ER tickets; later ones bump the counter row."""
+    from app.services.ticket_numbering import allocate_er_ticket_number
+    ticket = hierarchy_data_with_tickets["tickets"]["bengaluru"]
+    prefix = f"ER-{datetime.utcnow().strftime('%Y%m%d')}-"
+    ticket.ticket_number = f"{prefix}007"
+    test_db.flush()
+    assert allocate_er_ticket_number(test_db) == f"{prefix}008"
+    assert allocate_er_ticket_number(test_db) == f"{prefix}009"
+
+
+@pytest.mark.api
+def test_state_admin_bulk_reassign_skips_other_states(client, test_db, hierarchy_data_with_tickets):
+    """Bulk reassign updates only this state's tickets and logs one reassignment comment each."""
+    data = hierarchy_data_with_tickets
+    ka_ticket = data["tickets"]["bengaluru"]
+    mh_ticket = data["tickets"]["mumbai"]
+    engineer = data["users"][f"engineer_{ka_ticket.city_id}"]
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.post(
+        "/api/v1/state-admin/tickets/bulk-reassign",
+        json={"ticket_ids": [ka_ticket.id, mh_ticket.id], "engineer_id": engineer.id},
+        headers=_headers(token),
+    )
+    assert r.status_code == 200, r.json()
+    assert r.json()["message"] == "Reassigned 1 tickets"
+    test_db.expire_all()
+    assert (ka_ticket.assigned_engineer_id, ka_ticket.status) == (engineer.id, TicketStatus.ASSIGNED)
+    assert mh_ticket.assigned_engineer_id is None
+    comments = test_db.query(TicketComment).filter(TicketComment.comment_type == "reassignment").all()
+    assert [c.ticket_id for c in comments] == [ka_ticket.id]
+
+
+@pytest.mark.api
+def test_state_admin_policy_impact_breach_rates(client, test_db, hierarchy_data_with_tickets):
+    """Breach rates are computed in SQL against the requested target hours."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    now = datetime.now(timezone.utc)
+    ticket.created_at = now - timedelta(hours=30)
+    ticket.resolved_at = now - timedelta(hours=1)
+    ticket.sla_deadline = now - timedelta(hours=2)
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    for target_hours, predicted in ((24, 100.0), (48, 0.0)):
+        r = client.post("/api/v1/state-admin/policy-impact", json={"target_hours": target_hours}, headers=_headers(token))
+        assert r.status_code == 200
+        assert r.json() == {"current_breach_rate": 100.0, "predicted_breach_rate": predicted, "target_hours": target_hours}
+
+
+@pytest.mark.api
+def test_state_admin_demand_forecast_sums_outbound_usage(client, test_db, hierarchy_data):
+    """Outbound transactions are summed per part in SQL and projected over the requested days."""
+    bengaluru = next(c for c in hierarchy_data["cities"] if c.name == "Bengaluru")
+    part = Part(sku="HIER-PART-FC", name="Forecast Part")
+    test_db.add(part)
+    test_db.flush()
+    inventory = Inventory(part_id=part.id, organization_id=hierarchy_data["org"].id,
+                          state_id=bengaluru.state_id, city_id=bengaluru.id, current_stock=100)
+    test_db.add(inventory)
+    test_db.flush()
+    for qty, kind in ((30, "out"), (15, "out"), (500, "in")):
+        test_db.add(InventoryTransaction(part_id=part.id, inventory_id=inventory.id, transaction_type=kind,
+                                         quantity=qty, previous_stock=100, new_stock=100))
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/demand-forecast?days=30", headers=_headers(token))
+    assert r.status_code == 200
+    assert [(f["part_name"], f["predicted_demand"]) for f in r.json()] == [("Forecast Part", 15.0)]
+
+
+@pytest.mark.api
+def test_state_admin_sla_risk_lists_risky_tickets(client, test_db, hierarchy_data_with_tickets):
+    """SLA risk rows are projected columns, filtered by min_risk and the state."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    ticket.sla_breach_risk = 0.8
+    data["tickets"]["mumbai"].sla_breach_risk = 0.9
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/sla-risk?min_risk=0.5", headers=_headers(token))
+    assert r.status_code == 200
+    assert [(t["id"], t["status"], t["priority"], t["sla_breach_risk"]) for t in r.json()] == [
+        (ticket.id, "created", "medium", 0.8)
+    ]
+    etag = r.headers["etag"]
+    repeat = client.get(
+        "/api/v1/state-admin/sla-risk?min_risk=0.5", headers={**_headers(token), "If-None-Match": etag}
+    )
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+
+
+
+@pytest.mark.api
+def test_state_admin_sla_risk_refreshed_after_city_admin_write(client, test_db, hierarchy_data_with_tickets):
+    """A priority change through the city admin API invalidates the cached SLA risk rows and their ETag."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    ticket.sla_breach_risk = 0.8
+    test_db.commit()
+    token = _login(client, data["users"]["state_admin_KA"].email)
+    r = client.get("/api/v1/state-admin/sla-risk?min_risk=0.5", headers=_headers(token))
+    assert [t["priority"] for t in r.json()] == ["medium"]
+    etag = r.headers["etag"]
+
+    city_token = _login(client, data["users"][f"city_admin_{ticket.city_id}"].email)
+    r = client.post(
+        f"/api/v1/city-admin/tickets/{ticket.id}/priority", json={"priority": "high"}, headers=_headers(city_token)
+    )
+    assert r.status_code == 200, r.json()
+    r = client.get(
+        "/api/v1/state-admin/sla-risk?min_risk=0.5", headers={**_headers(token), "If-None-Match": etag}
+    )
+    assert r.status_code == 200
+    assert [t["priority"] for t in r.json()] == ["high"]
+    assert r.headers["etag"] != etag
+
+
+def test_state_city_ids_cached_until_city_insert(test_db, hierarchy_data):
+    """City ids per state are cached and dropped when a City row is inserted for that state."""
+    from app.services.state_views import state_city_ids
+    bengaluru = next(c for c in hierarchy_data["cities"] if c.name == "Bengaluru")
+    ids = state_city_ids(test_db, bengaluru.state_id)
+    assert bengaluru.id in ids
+    assert state_city_ids(test_db, bengaluru.state_id) is ids
+    new_city = City(name="Hubballi", state_id=bengaluru.state_id)
+    test_db.add(new_city)
+    test_db.flush()
+    assert new_city.id in state_city_ids(test_db, bengaluru.state_id)
+
+
+def test_state_city_ids_dropped_after_core_city_insert(test_db, hierarchy_data):
+    """A Core City insert skips the mapper events; invalidate_state_city_ids drops the cached ids."""
+    from sqlalchemy import insert
+    from app.services.state_views import invalidate_state_city_ids, state_city_ids
+    state_id = hierarchy_data["cities"][0].state_id
+    ids = state_city_ids(test_db, state_id)
+    city_id = test_db.execute(insert(City).values(name="Core City", state_id=state_id)).inserted_primary_key[0]
+    assert state_city_ids(test_db, state_id) is ids
+    invalidate_state_city_ids(state_id)
+    assert city_id in state_city_ids(test_db, state_id)
+
+
+def test_no_duplicate_api_routes():
+    """Each method/path pair is registered once (FastAPI silently serves only the first of duplicates)."""
+    from collections import Counter
+    from app.main import app
+    counts = Counter((method, route.path) for route in app.routes for method in getattr(route, "methods", None) or ())
+    assert [key for key, n in counts.items() if n > 1] == []
+
+
+@pytest.mark.api
+def test_engineer_eta_update_notifies_each_customer_channel(client, test_db, hierarchy_data_with_tickets):
+    """An ETA update queues one ENGINEER_ETA notification per customer channel in a single insert."""
+    from app.models.notification import Notification, NotificationChannel, NotificationType
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    engineer = data["users"][f"engineer_{ticket.city_id}"]
+    ticket.customer_id = data["users"]["customer1"].id
+    ticket.contact_preferences = ["whatsapp"]
+    ticket.assigned_engineer_id = engineer.id
+    ticket.status = TicketStatus.ASSIGNED
+    test_db.commit()
+    token = _login(client, engineer.email)
+    r = client.post(
+        f"/api/v1/tickets/{ticket.id}/eta",
+        json={"eta_start": "2026-01-01T10:00:00Z", "eta_end": "2026-01-01T12:00:00Z"},
+        headers=_headers(token),
+    )
+    assert r.status_code == 200, r.json()
+    notes = test_db.query(Notification).filter(Notification.ticket_id == ticket.id).all()
+    assert sorted((n.notification_type, n.channel) for n in notes) == sorted([
+        (NotificationType.ENGINEER_ETA, NotificationChannel.IN_APP),
+        (NotificationType.ENGINEER_ETA, NotificationChannel.WHATSAPP),
+    ])
+
+
+@pytest.mark.api
+def test_ticket_list_and_detail_include_related_rows(client, test_db, hierarchy_data_with_tickets):
+    """Listing falls back to the customer's name; detail lists parent, follow-ups and comment-driven timeline entries."""
+    data = hierarchy_data_with_tickets
+    parent = data["tickets"]["bengaluru"]
+    customer = data["users"]["customer1"]
+    parent.customer_id = customer.id
+    parent.customer_name = None
+    test_db.add(TicketComment(ticket_id=parent.id, user_id=customer.id, comment_text="ordered", comment_type="part_ordered"))
+    follow_up = Ticket(
+        ticket_number="TKT-HIER-KA-FU",
+        organization_id=parent.organization_id,
+        customer_id=customer.id,
+        country_id=parent.country_id,
+        state_id=parent.state_id,
+        city_id=parent.city_id,
+        service_address=parent.service_address,
+        issue_description="Follow-up",
+        parent_ticket_id=parent.id,
+    )
+    test_db.add(follow_up)
+    test_db.commit()
+
+    token = _login(client, customer.email)
+    r = client.get("/api/v1/tickets/", headers=_headers(token))
+    assert r.status_code == 200
+    listed = {t["ticket_number"]: t for t in r.json()}
+    assert listed[parent.ticket_number]["customer_name"] == customer.full_name
+    assert listed[parent.ticket_number]["created_at"] == parent.created_at.isoformat()
+    assert [e["label"] for e in listed[parent.ticket_number]["status_timeline"]] == [
+        "Ticket created", "Assigned to engineer", "Engineer started", "Waiting for parts", "Resolved", "Closed",
+    ]
+
+    r = client.get(f"/api/v1/tickets/{follow_up.id}", headers=_headers(token))
+    assert r.status_code == 200
+    assert r.json()["parent_ticket"]["id"] == parent.id
+    assert r.json()["created_at"] == follow_up.created_at.isoformat()
+    r = client.get(f"/api/v1/tickets/{parent.id}", headers=_headers(token))
+    assert [t["id"] for t in r.json()["follow_up_tickets"]] == [follow_up.id]
+    assert {"label": "Part ordered", "completed": True} in r.json()["status_timeline"]
+    assert r.json()["customer"]["id"] == customer.id
+
+
+@pytest.mark.api
+def test_ticket_tracking_follows_engineer_location_updates(client, test_db, hierarchy_data_with_tickets):
+    """Tracking serves the cached location until the engineer posts a new one."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    customer = data["users"]["customer1"]
+    engineer = data["users"][f"engineer_{ticket.city_id}"]
+    ticket.customer_id = customer.id
+    test_db.commit()
+    customer_token = _login(client, customer.email)
+    r = client.get(f"/api/v1/tickets/{ticket.id}/tracking", headers=_headers(customer_token))
+    assert r.status_code == 400
+
+    ticket.assigned_engineer_id = engineer.id
+    test_db.commit()
+    engineer_token = _login(client, engineer.email)
+    r = client.put("/api/v1/users/me/location", json={"latitude": "12.97", "longitude": "77.59"}, headers=_headers(engineer_token))
+    assert r.status_code == 200
+    r = client.get(f"/api/v1/tickets/{ticket.id}/tracking", headers=_headers(customer_token))
+    assert r.json() == {"engineer_id": engineer.id, "latitude": "12.97", "longitude": "77.59"}
+
+    client.put("/api/v1/users/me/location", json={"latitude": "12.98", "longitude": "77.60"}, headers=_headers(engineer_token))
+    r = client.get(f"/api/v1/tickets/{ticket.id}/tracking", headers=_headers(customer_token))
+    assert (r.json()["latitude"], r.json()["longitude"]) == ("12.98", "77.60")
+
+
+@pytest.mark.api
+def test_ticket_estimate_prices_suggested_parts(client, test_db, hierarchy_data_with_tickets):
+    """Suggested parts given as ids or {part_id} dicts are priced; other entries are ignored."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    customer = data["users"]["customer1"]
+    fan = Part(sku="HIER-EST-FAN", name="Fan", selling_price=150.0)
+    pump = Part(sku="HIER-EST-PUMP", name="Pump", selling_price=None)
+    test_db.add_all([fan, pump])
+    test_db.flush()
+    ticket.customer_id = customer.id
+    ticket.warranty_status = "out_of_warranty"
+    ticket.ai_suggested_parts = [fan.id, {"part_id": pump.id}, {"name": "unknown"}, "belt"]
+    test_db.commit()
+
+    r = client.get(f"/api/v1/tickets/{ticket.id}/estimate", headers=_headers(_login(client, customer.email)))
+    assert r.status_code == 200
+    body = r.json()
+    assert sorted((p["part_name"], p["price"]) for p in body["parts"]) == [("Fan", 150.0), ("Pump", 0)]
+    assert body["labour"] == 300
+    assert body["total_estimate"] == 450
+
+
+@pytest.mark.api
+def test_engineer_eta_body_is_validated(client, test_db, hierarchy_data_with_tickets):
+    """ETA bodies parse ISO datetimes once: blanks leave the field unset, malformed values are rejected."""
+    data = hierarchy_data_with_tickets
+    ticket = data["tickets"]["bengaluru"]
+    engineer = data["users"][f"engineer_{ticket.city_id}"]
+    ticket.assigned_engineer_id = engineer.id
+    ticket.status = TicketStatus.ASSIGNED
+    test_db.commit()
+    token = _login(client, engineer.email)
+    r = client.post(f"/api/v1/tickets/{ticket.id}/eta", json={"eta_start": "soon"}, headers=_headers(token))
+    assert r.status_code == 422
+    r = client.post(
+        f"/api/v1/tickets/{ticket.id}/eta", json={"eta_start": "", "eta_end": "2026-01-01T12:00:00Z"}, headers=_headers(token)
+    )
+    assert r.status_code == 200, r.json()
+    test_db.refresh(ticket)
+    assert ticket.engineer_eta_start is None
+    assert ticket.engineer_eta_end.replace(tzinfo=None) == datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.mark.api
+def test_org_admin_create_partner_rejects_duplicate_email(client, test_db, hierarchy_data):
+    """A partner reusing an existing organization email is a 400, not a 500."""
+    hierarchy_data["org"].org_type = OrganizationType.OEM
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["org_admin"].email)
+    r = client.post(
+        "/api/v1/org-admin/partners",
+        json={"name": "Dup Partner", "email": hierarchy_data["org"].email, "phone": "+912222222222"},
+        headers=_headers(token),
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "This email is already used by another organization"
+
+
+@pytest.mark.api
+def test_org_admin_create_partner_does_not_mask_other_integrity_errors(client, test_db, hierarchy_data):
+    """Integrity errors other than the email index propagate instead of being reported as email conflicts."""
+    from sqlalchemy.exc import IntegrityError
+    hierarchy_data["org"].org_type = OrganizationType.OEM
+    test_db.commit()
+    token = _login(client, hierarchy_data["users"]["org_admin"].email)
+    # Missing name violates NOT NULL, not the email index
+    with pytest.raises(IntegrityError):
+        client.post(
+            "/api/v1/org-admin/partners",
+            json={"email": "fresh-partner@test.com", "phone": "+912222222223"},
+            headers=_headers(token),
+        )
+
+
+def test_commit_organization_maps_concurrent_email_conflict(test_db, hierarchy_data):
+    """An email claimed after update_my_organization's pre-check still surfaces as the duplicate-email 400."""
+    from fastapi import HTTPException
+    from app.api.v1.endpoints.org_admin import _commit_organization
+    test_db.add(Organization(
+        name="Racing Org",
+        org_type=OrganizationType.SERVICE_COMPANY,
+        email=hierarchy_data["org"].email,
+        phone="+913333333333",
+    ))
+    with pytest.raises(HTTPException) as exc:
+        _commit_organization(test_db)
+    assert exc.value.status_code == 400
@@ -8,6 +8,18 @@ from app.models.location import Country
 from app.models.user import UserRole
 
 
+@pytest.fixture(autouse=True)
+def clear_signup_caches():
+    """Each test rolls back its rows, so cached location ids and plans must not leak between tests."""
+    from app.api.v1.endpoints.signup import _location_ids_cache
+    from app.services.subscription_billing import active_plan_cache
+    _location_ids_cache.clear()
+    active_plan_cache.clear()
+    yield
+    _location_ids_cache.clear()
+    active_plan_cache.clear()
+
+
 @pytest.fixture
 def plan_in_db(test_db):
     """Ensure at least one active plan exists for signup."""
@@ -120,3 +132,293 @@ def test_signup_duplicate_org_email_fails(client, plan_in_db):
     r2 = client.post("/api/v1/signup/", json=payload)
     assert r2.status_code == 400
     assert "already exists" in r2.json().get("detail", "").lower()
+
+
+@pytest.mark.api
+def test_signup_links_vendor_by_code(client, test_db, plan_in_db):
+    """Signup with a vendor_code (and an unknown vendor_id) links the org to the vendor matching the code."""
+    import time
+    from app.models.subscription import Vendor
+    ts = int(time.time())
+    vendor = Vendor(
+        name="Signup Vendor",
+        email=f"vendor{ts}@workflow-test.com",
+        phone="+915555555555",
+        vendor_code=f"VEND{ts}",
+        commission_rate=0.1,
+    )
+    test_db.add(vendor)
+    test_db.commit()
+    payload = {
+        "org_name": f"Vendor Org {ts}",
+        "org_type": "service_company",
+        "org_email": f"vendororg{ts}@workflow-test.com",
+        "org_phone": "+919999999999",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "New Delhi",
+        "admin_name": "Vendor Admin",
+        "admin_email": f"vendoradmin{ts}@workflow-test.com",
+        "admin_phone": f"+9155555{ts % 100000:05d}",
+        "admin_password": "Test@12345",
+        "plan_id": plan_in_db.id,
+        "billing_period": "monthly",
+        "vendor_id": 987654,
+        "vendor_code": f" vend{ts} ",
+    }
+    response = client.post("/api/v1/signup/", json=payload)
+    assert response.status_code == 201, response.json()
+    data = response.json()
+    assert data["vendor"]["vendor_code"] == vendor.vendor_code
+    assert data["vendor"]["commission_earned"] == pytest.approx(plan_in_db.monthly_price * 0.1)
+
+
+@pytest.mark.api
+def test_signup_links_subscription_to_organization(client, test_db, plan_in_db):
+    """Signup persists the subscription and points the organization at it."""
+    import time
+    from app.models.organization import Organization
+    from app.models.subscription import Subscription
+    ts = int(time.time())
+    payload = {
+        "org_name": f"Linked Org {ts}",
+        "org_type": "service_company",
+        "org_email": f"linkedorg{ts}@workflow-test.com",
+        "org_phone": "+919999999999",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "New Delhi",
+        "admin_name": "Linked Admin",
+        "admin_email": f"linkedadmin{ts}@workflow-test.com",
+        "admin_phone": f"+9144444{ts % 100000:05d}",
+        "admin_password": "Test@12345",
+        "plan_id": plan_in_db.id,
+        "billing_period": "annual",
+    }
+    response = client.post("/api/v1/signup/", json=payload)
+    assert response.status_code == 201, response.json()
+    data = response.json()
+    org = test_db.query(Organization).filter(Organization.id == data["organization"]["id"]).first()
+    assert org.subscription_id == data["subscription"]["id"]
+    subscription = test_db.query(Subscription).filter(Subscription.id == org.subscription_id).first()
+    assert subscription.organization_id == org.id
+    assert subscription.current_price == plan_in_db.annual_price
+    assert data["user"]["id"] is not None
+
+
+@pytest.mark.api
+def test_signup_rejects_invalid_billing_period(client, plan_in_db):
+    """Signup returns 400 (not 422) with a readable message for an unknown billing period."""
+    payload = {
+        "org_name": "Bad Period Org",
+        "org_type": "service_company",
+        "org_email": "badperiod@workflow-test.com",
+        "org_phone": "+919999999999",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "New Delhi",
+        "admin_name": "Admin",
+        "admin_email": "badperiod-admin@workflow-test.com",
+        "admin_phone": "+918888888800",
+        "plan_id": plan_in_db.id,
+        "billing_period": "weekly",
+    }
+    response = client.post("/api/v1/signup/", json=payload)
+    assert response.status_code == 400
+    assert "billing period" in response.json()["detail"].lower()
+    payload["org_name"] = ""
+    response = client.post("/api/v1/signup/", json=payload)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing required field: org_name"
+
+
+@pytest.mark.api
+def test_signup_duplicate_admin_phone_fails(client, plan_in_db):
+    """Signup reusing an existing admin phone returns 400 from the unique index, not a 500."""
+    import time
+    ts = int(time.time())
+    payload = {
+        "org_name": f"Phone Org {ts}",
+        "org_type": "service_company",
+        "org_email": f"phoneorg{ts}@workflow-test.com",
+        "org_phone": "+919999999999",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "New Delhi",
+        "admin_name": "Phone Admin",
+        "admin_email": f"phoneadmin{ts}@workflow-test.com",
+        "admin_phone": f"+9133333{ts % 100000:05d}",
+        "admin_password": "Test@12345",
+        "plan_id": plan_in_db.id,
+        "billing_period": "monthly",
+    }
+    r1 = client.post("/api/v1/signup/", json=payload)
+    assert r1.status_code == 201, r1.json()
+    payload["org_email"] = f"phoneorg2{ts}@workflow-test.com"
+    payload["admin_email"] = f"phoneadmin2{ts}@workflow-test.com"
+    r2 = client.post("/api/v1/signup/", json=payload)
+    assert r2.status_code == 400
+    assert r2.json()["detail"] == "User with this phone number already exists"
+
+
+def test_find_existing_location_ids_single_query(test_db):
+    """Existing country/state/city resolve through the JOIN fast path by ids or by codes/names."""
+    from app.api.v1.endpoints.signup import _find_existing_location_ids
+    from app.models.location import State, City
+    from app.schemas.signup import SignupRequest
+    country = test_db.query(Country).filter(Country.code == "IN").first()
+    if not country:
+        country = Country(name="India", code="IN")
+        test_db.add(country)
+        test_db.flush()
+    state = State(name="Goa", code="GA", country_id=country.id)
+    test_db.add(state)
+    test_db.flush()
+    city = City(name="Panaji", state_id=state.id)
+    test_db.add(city)
+    test_db.flush()
+    base = {
+        "org_name": "x", "org_type": "dealer", "org_email": "x@x.com", "org_phone": "1",
+        "admin_name": "x", "admin_email": "a@x.com", "admin_phone": "2",
+        "plan_id": 1, "billing_period": "monthly",
+    }
+    by_code = SignupRequest(**base, country_code="in", state_code="ga", city_name="Panaji")
+    assert _find_existing_location_ids(test_db, by_code) == (country.id, state.id, city.id)
+    by_id = SignupRequest(**base, country_id=country.id, state_id=state.id, city_id=city.id)
+    assert _find_existing_location_ids(test_db, by_id) == (country.id, state.id, city.id)
+    missing = SignupRequest(**base, country_code="IN", state_code="GA", city_name="Margao")
+    assert _find_existing_location_ids(test_db, missing) is None
+
+
+def test_signup_request_normalizes_inputs_once():
+    """Codes are stripped/uppercased, names stripped, emails lowercased, blanks become None."""
+    from app.schemas.signup import SignupRequest
+    payload = SignupRequest(
+        org_name=" Org ", org_type="dealer", org_email=" Org@X.com ", org_phone=" 1 ",
+        admin_name="x", admin_email="A@X.COM", admin_phone="2",
+        plan_id=1, billing_period="Monthly",
+        country_code=" in ", state_code="  ", state_name=" Goa ", city_name=" Panaji ", vendor_code=" v1 ",
+    )
+    assert payload.org_name == "Org"
+    assert payload.org_email == "org@x.com"
+    assert payload.admin_email == "a@x.com"
+    assert payload.country_code == "IN"
+    assert payload.state_code is None
+    assert payload.state_name == "Goa"
+    assert payload.city_name == "Panaji"
+    assert payload.vendor_code == "V1"
+
+
+@pytest.mark.api
+def test_signup_customer_rejects_email_of_other_account_type(client, plan_in_db):
+    """Customer signup matches existing users by email or phone in one lookup and rejects non-customers."""
+    import time
+    ts = int(time.time())
+    org_payload = {
+        "org_name": f"Customer Org {ts}",
+        "org_type": "service_company",
+        "org_email": f"custorg{ts}@workflow-test.com",
+        "org_phone": "+919999999999",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "New Delhi",
+        "admin_name": "Customer Org Admin",
+        "admin_email": f"custadmin{ts}@workflow-test.com",
+        "admin_phone": f"+9122222{ts % 100000:05d}",
+        "admin_password": "Test@12345",
+        "plan_id": plan_in_db.id,
+        "billing_period": "monthly",
+    }
+    r_org = client.post("/api/v1/signup/", json=org_payload)
+    assert r_org.status_code == 201, r_org.json()
+    org_id = r_org.json()["organization"]["id"]
+    customer = {
+        "organization_id": org_id,
+        "full_name": "Customer One",
+        "email": f"customer{ts}@workflow-test.com",
+        "phone": f"+9111111{ts % 100000:05d}",
+        "password": "Test@12345",
+    }
+    r1 = client.post("/api/v1/signup/customer", json=customer)
+    assert r1.status_code == 201, r1.json()
+    assert r1.json()["user"]["role"] == UserRole.CUSTOMER.value
+    clash = dict(customer, email=org_payload["admin_email"], phone="+910000000001")
+    r2 = client.post("/api/v1/signup/customer", json=clash)
+    assert r2.status_code == 400
+    assert "another account type" in r2.json()["detail"]
+
+
+def test_active_plan_cache_serves_until_invalidated(test_db, plan_in_db):
+    """get_active_plan caches the pricing row; popping the entry makes the next call re-read it."""
+    from app.services.subscription_billing import active_plan_cache, get_active_plan
+    assert get_active_plan(test_db, plan_in_db.id).name == plan_in_db.name
+    plan_in_db.is_active = False
+    test_db.commit()
+    assert get_active_plan(test_db, plan_in_db.id) is not None
+    active_plan_cache.pop(plan_in_db.id, None)
+    assert get_active_plan(test_db, plan_in_db.id) is None
+
+
+@pytest.mark.api
+def test_signup_requires_city(client, plan_in_db):
+    """Location rules run after field validation and return their own 400 message."""
+    payload = {
+        "org_name": "Test Org",
+        "org_type": "service_company",
+        "org_email": "org@test.com",
+        "org_phone": "+919999999999",
+        "admin_name": "Admin",
+        "admin_email": "admin@test.com",
+        "admin_phone": "+918888888888",
+        "plan_id": plan_in_db.id,
+        "billing_period": "monthly",
+        "country_code": "IN",
+        "state_code": "DL",
+        "city_name": "  ",
+    }
+    response = client.post("/api/v1/signup/", json=payload)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing location: provide city_id or city_name"
+
+
+def test_location_auto_create_reuses_row_inserted_by_concurrent_signup(test_db, monkeypatch):
+    """A state/city inserted after the lookup but before the insert is reused instead of failing signup."""
+    from app.api.v1.endpoints import signup
+    from app.models.location import State, City
+    from app.schemas.signup import SignupRequest
+    country = test_db.query(Country).filter(Country.code == "IN").first()
+    if not country:
+        country = Country(name="India", code="IN")
+        test_db.add(country)
+        test_db.flush()
+    rival = {}
+
+    class RacingStates(dict):
+        def get(self, key, default=None):
+            # Runs after the existing-state lookup missed: another signup creates the row now
+            if key and "state" not in rival:
+                rival["state"] = State(name=key, code="SK", country_id=country.id)
+                test_db.add(rival["state"])
+                test_db.flush()
+            return super().get(key, default)
+
+    class RacingCities(dict):
+        def __getitem__(self, key):
+            if "city" not in rival:
+                rival["city"] = City(name="Gangtok", state_id=rival["state"].id)
+                test_db.add(rival["city"])
+                test_db.flush()
+            return super().__getitem__(key)
+
+    monkeypatch.setattr(signup, "_STATE_BY_NAME", RacingStates(signup._STATE_BY_NAME))
+    monkeypatch.setattr(signup, "INDIA_CITIES_BY_STATE", RacingCities(signup.INDIA_CITIES_BY_STATE))
+    payload = SignupRequest(
+        org_name="x", org_type="dealer", org_email="x@x.com", org_phone="1",
+        admin_name="x", admin_email="a@x.com", admin_phone="2", plan_id=1, billing_period="monthly",
+        country_code="IN", state_name="Sikkim", city_name="Gangtok",
+    )
+    state_id = signup._resolve_state_id(test_db, payload, country.id)
+    assert state_id == rival["state"].id
+    assert signup._resolve_city_id(test_db, payload, state_id) == rival["city"].id
+    assert test_db.query(State).filter(State.country_id == country.id, State.name == "Sikkim").count() == 1
+    assert test_db.query(City).filter(City.state_id == state_id, City.name == "Gangtok").count() == 1